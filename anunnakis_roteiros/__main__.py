@@ -0,0 +1,7 @@
+"""Permite rodar `python -m anunnakis_roteiros ...` a partir da raiz do repositório."""
+import sys
+
+from anunnakis_roteiros.src.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
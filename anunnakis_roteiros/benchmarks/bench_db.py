@@ -0,0 +1,73 @@
+"""Benchmark da gravação de hashes: um commit por imagem x lote em transação (WAL).
+
+Uso (na pasta anunnakis_roteiros):
+    python benchmarks/bench_db.py --images 1000 --dir "G:\\Meu Drive\\SQL\\roteiros"
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sqlite_utils
+
+from src.db_manager import DatabaseManager
+
+
+def fake_hashes(count, seed):
+    return [hashlib.md5(f"{seed}-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def run_per_image(folder, hashes):
+    """Comportamento antigo: journal padrão, uma consulta e um commit por imagem."""
+    db = sqlite_utils.Database(os.path.join(folder, "antigo.db"))
+    db["image_hashes"].create({"hash": str, "term": str, "downloaded_at": str},
+                              pk="hash", if_not_exists=True)
+    start = time.perf_counter()
+    for image_hash in hashes:
+        try:
+            db["image_hashes"].get(image_hash)
+        except sqlite_utils.db.NotFoundError:
+            pass
+        db["image_hashes"].insert({
+            "hash": image_hash,
+            "term": "bench",
+            "downloaded_at": datetime.now().isoformat()
+        }, pk="hash", replace=True)
+    return time.perf_counter() - start
+
+
+def run_batched(folder, hashes, batch_size):
+    """Novo caminho: consulta em lote, buffer e uma transação por lote."""
+    db_manager = DatabaseManager("novo.db", base_dir=folder, hash_batch_size=batch_size)
+    start = time.perf_counter()
+    for offset in range(0, len(hashes), 8):
+        batch = hashes[offset:offset + 8]
+        known = db_manager.is_hash_downloaded_many(batch)
+        db_manager.add_downloaded_hashes([(h, "bench", None) for h in batch if h not in known])
+    db_manager.flush_hashes()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--dir', default=None, help="pasta do BD (use a do Google Drive para medir o caso real)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as folder:
+        before = run_per_image(folder, fake_hashes(args.images, "a"))
+        after = run_batched(folder, fake_hashes(args.images, "b"), args.batch_size)
+
+    print(f"um commit por imagem: {before:7.3f}s ({before / args.images * 1000:.2f} ms/imagem)")
+    print(f"lote + WAL:           {after:7.3f}s ({after / args.images * 1000:.2f} ms/imagem)")
+    print(f"ganho: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark do download de imagens: sessão padrão do icrawler x PooledSession.
+
+Sobe um servidor HTTP local (keep-alive, com latência artificial por imagem)
+e baixa a mesma lista de URLs com o UrlListCrawler do icrawler, dividida em
+vários jobs (um crawler por job, como no ImageScraper), trocando só a sessão e
+o número de threads de download. Mostra o tempo até o último arquivo, imagens/s
+e quantas conexões TCP o servidor recebeu.
+
+Uso (na pasta anunnakis_roteiros):
+    python benchmarks/bench_downloader.py --images 200 --latency 0.05 --threads 4 8
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+from icrawler.builtin import UrlListCrawler
+
+from src.crawler import StreamingImageDownloader
+from src.http_pool import DownloadSettings, PooledSession, attach_session
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payload = b""
+    latency = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with ImageHandler.lock:
+            ImageHandler.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+
+def create_jpeg(width):
+    """JPEG com ruído, para o arquivo ter um tamanho realista depois de comprimido."""
+    noise = Image.effect_noise((width // 4, width // 4), 60)
+    buffer = io.BytesIO()
+    noise.convert("RGB").resize((width, width * 3 // 4)).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def start_server(width, latency):
+    ImageHandler.payload = create_jpeg(width)
+    ImageHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_jobs(url_files, threads, session=None):
+    """Baixa cada lista num crawler novo. Retorna (segundos baixando, arquivos, conexões)."""
+    ImageHandler.connections = 0
+    count = 0
+    elapsed = 0.0
+    for url_file in url_files:
+        with tempfile.TemporaryDirectory() as folder:
+            crawler = UrlListCrawler(downloader_cls=StreamingImageDownloader, downloader_threads=threads,
+                                     storage={"root_dir": folder}, log_level=logging.ERROR)
+            if session is not None:
+                attach_session(crawler, session)
+            finished = []
+            crawler.downloader.on_file = lambda path, file_hash: finished.append(time.perf_counter())
+            start = time.perf_counter()
+            crawler.crawl(url_file)
+            # O crawl() ainda espera o timeout da fila depois do último download;
+            # conta só até o instante em que o último arquivo terminou
+            elapsed += (max(finished) if finished else time.perf_counter()) - start
+            count += len(os.listdir(folder))
+    return elapsed, count, ImageHandler.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1600, help="largura das imagens servidas")
+    parser.add_argument("--latency", type=float, default=0.05, help="latência por imagem, em segundos")
+    parser.add_argument("--threads", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=3, help="em quantos jobs (crawlers) dividir as imagens")
+    args = parser.parse_args()
+
+    server = start_server(args.width, args.latency)
+    port = server.server_address[1]
+    url_files = []
+    for job in range(args.jobs):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            for i in range(job, args.images, args.jobs):
+                f.write(f"http://127.0.0.1:{port}/img/{i}.jpg\n")
+            url_files.append(f.name)
+
+    runs = [("icrawler padrão (1 thread)", 1, None)]
+    for threads in args.threads:
+        runs.append((f"icrawler padrão ({threads} threads)", threads, None))
+        settings = DownloadSettings(downloader_threads=threads, per_host_limit=args.per_host,
+                                    global_limit=max(threads, args.per_host))
+        runs.append((f"PooledSession ({threads} threads)", threads, PooledSession(settings)))
+
+    print(f"{args.images} imagens de {len(ImageHandler.payload) // 1000} KB em {args.jobs} jobs, "
+          f"latência {args.latency * 1000:.0f} ms")
+    try:
+        for name, threads, session in runs:
+            elapsed, count, connections = run_jobs(url_files, threads, session)
+            print(f"{name:<32} {elapsed:6.2f}s  {count / elapsed:7.1f} img/s  "
+                  f"{count} arquivos  {connections} conexões")
+    finally:
+        for url_file in url_files:
+            os.remove(url_file)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
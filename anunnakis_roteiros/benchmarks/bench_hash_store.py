@@ -0,0 +1,75 @@
+"""Benchmark do armazenamento de hashes: latência de consulta e memória com N hashes.
+
+Uso (na pasta anunnakis_roteiros):
+    python benchmarks/bench_hash_store.py --hashes 1000000
+"""
+import argparse
+import hashlib
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.db_manager import DatabaseManager
+
+
+def digests(prefix, count):
+    for i in range(count):
+        yield hashlib.md5(f"{prefix}-{i}".encode()).hexdigest()
+
+
+def rss_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 if sys.platform != 'darwin' else usage / (1024 * 1024)
+
+
+def measure(label, func, hashes):
+    start = time.perf_counter()
+    for image_hash in hashes:
+        func(image_hash)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / len(hashes) * 1e6:8.2f} µs/consulta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hashes', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_manager = DatabaseManager(base_dir=folder, hash_batch_size=50_000)
+
+        start = time.perf_counter()
+        db_manager.add_downloaded_hashes((h, "bench", None) for h in digests("salvo", args.hashes))
+        db_manager.flush_hashes()
+        print(f"{args.hashes} hashes gravados em {time.perf_counter() - start:.1f}s")
+
+        # Recarrega do zero, como numa nova execução do app
+        DatabaseManager._initialized_files.clear()
+        start = time.perf_counter()
+        db_manager = DatabaseManager(base_dir=folder)
+        print(f"abertura com filtro de Bloom: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        hits = list(digests("salvo", args.queries))
+        misses = list(digests("novo", args.queries))
+        measure("consulta (novo, Bloom)", db_manager.is_hash_downloaded, misses)
+        measure("consulta (já salvo, SQLite)", db_manager.is_hash_downloaded, hits)
+
+        start = time.perf_counter()
+        db_manager.is_hash_downloaded_many(misses + hits)
+        elapsed = time.perf_counter() - start
+        print(f"{'consulta em lote (mista)':<28} {elapsed / (2 * args.queries) * 1e6:8.2f} µs/hash")
+
+        db_size = os.path.getsize(db_manager.db_file) / (1024 * 1024)
+        print(f"filtro de Bloom em memória:  {db_manager._bloom.memory_bytes() / (1024 * 1024):.1f} MB")
+        print(f"arquivo do BD:               {db_size:.1f} MB")
+        print(f"memória residente (pico):    {rss_mb():.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark da etapa de validação/hash: serial x pool de threads x pool de processos.
+
+Uso (na pasta anunnakis_roteiros):
+    python benchmarks/bench_validation.py --files 200 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+
+from src.image_validation import validate_candidate
+
+
+def create_images(folder, count, size):
+    """Gera `count` JPEGs com ruído (difíceis de comprimir, como fotos reais)."""
+    paths = []
+    for i in range(count):
+        rnd = random.Random(i)
+        noise = Image.effect_noise((size // 4, size // 4), 40 + rnd.random() * 60)
+        img = noise.convert('RGB').resize((size, size * 3 // 4))
+        path = os.path.join(folder, f"{i:06d}.jpg")
+        img.save(path, 'JPEG', quality=90)
+        paths.append(path)
+    return paths
+
+
+def run_serial(paths, min_dimension):
+    return [validate_candidate(p, min_dimension) for p in paths]
+
+
+def run_pool(executor_cls, workers, paths, min_dimension):
+    with executor_cls(max_workers=workers) as pool:
+        return list(pool.map(validate_candidate, paths, [min_dimension] * len(paths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--size', type=int, default=1600, help="largura das imagens geradas")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"Gerando {args.files} imagens {args.size}px...")
+        paths = create_images(folder, args.files, args.size)
+
+        timings = {}
+        for name, runner in (
+            ("serial", lambda: run_serial(paths, 480)),
+            (f"threads ({args.workers})", lambda: run_pool(ThreadPoolExecutor, args.workers, paths, 480)),
+            (f"processos ({args.workers})", lambda: run_pool(ProcessPoolExecutor, args.workers, paths, 480)),
+        ):
+            start = time.perf_counter()
+            results = runner()
+            timings[name] = time.perf_counter() - start
+            assert all(r['ok'] for r in results)
+
+        base = timings["serial"]
+        for name, elapsed in timings.items():
+            print(f"{name:<16} {elapsed:7.2f}s  {args.files / elapsed:7.1f} img/s  speedup {base / elapsed:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
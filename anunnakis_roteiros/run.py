@@ -1,3 +1,6 @@
+import time
+_STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
 from dotenv import load_dotenv
@@ -19,6 +22,6 @@ if __name__ == "__main__":
         print("   Exemplo: copie .env.example para .env e adicione sua chave.")
     
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(startup_time=_STARTUP_TIME)
     window.show()
     sys.exit(app.exec())
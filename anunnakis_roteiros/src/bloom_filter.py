@@ -0,0 +1,83 @@
+"""Filtro de Bloom persistido em disco para os digests de imagens já baixadas.
+
+Responde "com certeza nunca vi" sem tocar no SQLite. Um "talvez já vi" (inclui
+os falsos positivos, ~1%) ainda precisa ser confirmado no banco.
+"""
+import hashlib
+import math
+import os
+import struct
+
+_MAGIC = b'ANBF1'
+_HEADER = struct.Struct('<5sQIQQd')  # magic, bits, hashes, count, capacidade, taxa de erro
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        # Os digests já são MD5 (uniformes); outras chaves passam pelo MD5 antes
+        if len(digest) != 16:
+            digest = hashlib.md5(digest).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        bits = self.bits
+        for pos in self._positions(digest):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def save(self, path):
+        """Grava o filtro de forma atômica (arquivo temporário + os.replace)."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count,
+                                 self.capacity, self.error_rate))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um filtro salvo com save(); retorna None se o arquivo não existir ou for inválido."""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                magic, num_bits, num_hashes, count, capacity, error_rate = _HEADER.unpack(header)
+                if magic != _MAGIC:
+                    return None
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+        if len(bits) != (num_bits + 7) // 8:
+            return None
+
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        bloom.count = count
+        bloom.capacity = capacity
+        bloom.error_rate = error_rate
+        return bloom
@@ -0,0 +1,21 @@
+"""Interfaces de callback usadas pelo scraper e pela fila, sem depender de Qt."""
+
+
+class CallbackSignal:
+    """Adapta uma função ao formato `.emit(valor)` esperado por scrape_images."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+
+    def emit(self, value):
+        if self.callback is not None:
+            self.callback(value)
+
+
+def as_signal(target):
+    """Aceita um sinal Qt (ou qualquer objeto com .emit), uma função ou None."""
+    if target is None:
+        return CallbackSignal()
+    if hasattr(target, "emit"):
+        return target
+    return CallbackSignal(target)
@@ -0,0 +1,219 @@
+"""Interface de linha de comando (sem Qt) para scraping e geração de roteiros.
+
+Pensada para cron e servidores sem interface gráfica: lê termos/prompts de
+argumentos, de um arquivo ou da entrada padrão e escreve o progresso como
+JSON, um evento por linha, na saída padrão.
+
+Exemplos (na raiz do repositório):
+    python -m anunnakis_roteiros scrape "Nibiru" "Anunnaki King" --max-images 20
+    cat termos.txt | python -m anunnakis_roteiros scrape --high-res
+    python -m anunnakis_roteiros generate --prompts-file prompts.txt
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from .db_manager import DatabaseManager, JOB_FAILED
+from .http_pool import (DownloadSettings, DEFAULT_DOWNLOADER_THREADS, DEFAULT_GLOBAL_LIMIT,
+                        DEFAULT_PER_HOST_LIMIT, DEFAULT_READ_TIMEOUT)
+
+
+_print_lock = threading.Lock()
+# Saída dos eventos JSON; prints soltos dos módulos vão para stderr (ver main)
+_event_stream = None
+
+
+def emit_event(event, **fields):
+    """Escreve um evento JSON numa linha da saída padrão."""
+    fields["event"] = event
+    fields["time"] = datetime.now().isoformat(timespec="seconds")
+    stream = _event_stream or sys.stdout
+    with _print_lock:
+        stream.write(json.dumps(fields, ensure_ascii=False) + "\n")
+        stream.flush()
+
+
+def read_items(values, path):
+    """Junta itens dos argumentos, de um arquivo ou da entrada padrão ('-').
+
+    Linhas vazias e linhas iniciadas por '#' são ignoradas.
+    """
+    lines = list(values or [])
+    if path == "-" or (path is None and not lines and not sys.stdin.isatty()):
+        lines.extend(sys.stdin.read().splitlines())
+    elif path:
+        with open(path, encoding="utf-8") as f:
+            lines.extend(f.read().splitlines())
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def open_database(args):
+    return DatabaseManager(base_dir=args.db_dir or os.getenv("ANUNNAKIS_DB_DIR") or None)
+
+
+def cmd_scrape(args):
+    from .image_scraper import ImageScraper
+    from .job_queue import ScrapeJobQueue
+    from .scrape_log import DEBUG, INFO, enable_debug_file
+
+    terms = read_items(args.terms, args.terms_file)
+    db_manager = open_database(args)
+    if args.debug_log:
+        enable_debug_file(args.debug_log)
+    scraper = ImageScraper(db_manager, image_dir=args.image_dir,
+                           workers=args.workers, pool_kind=args.pool,
+                           log_level=DEBUG if args.log_level == "debug" else INFO,
+                           download_settings=DownloadSettings(
+                               downloader_threads=args.downloader_threads,
+                               per_host_limit=args.per_host,
+                               global_limit=args.max_connections,
+                               read_timeout=args.timeout
+                           ))
+
+    if not args.queue:
+        if not terms:
+            emit_event("error", message="Nenhum termo informado")
+            return 2
+        total_saved = 0
+        for term in terms:
+            saved = scraper.scrape_images(
+                term, args.max_images, args.high_res,
+                lambda msg, term=term: emit_event("log", term=term, message=msg),
+                lambda value, term=term: emit_event("progress", term=term, value=value),
+            )
+            total_saved += saved
+            emit_event("done", term=term, saved=saved, max_images=args.max_images)
+        emit_event("finished", terms=len(terms), saved=total_saved, image_dir=scraper.image_dir)
+        return 0
+
+    # Modo fila: usa a fila persistente do BD (retoma jobs pendentes/interrompidos)
+    job_queue = ScrapeJobQueue(
+        scraper, db_manager, concurrency=args.concurrency,
+        on_log=lambda job, msg: emit_event("log", job_id=job["id"], term=job["term"], message=msg),
+    )
+    job_queue.resume_interrupted()
+    job_ids = job_queue.add_terms(terms, args.max_images, args.high_res)
+    emit_event("queued", job_ids=job_ids)
+    job_queue.start()
+    try:
+        job_queue.wait()
+    except KeyboardInterrupt:
+        job_queue.stop()
+        job_queue.wait()
+
+    # Só os jobs que este processo executou (a GUI pode estar usando a mesma fila)
+    failed = 0
+    for job_id in job_queue.claimed_job_ids:
+        job = db_manager.get_scrape_job(job_id)
+        if job is None:
+            continue
+        emit_event("job", job_id=job["id"], term=job["term"], status=job["status"],
+                   saved=job["saved_count"], max_images=job["max_images"], message=job["message"],
+                   bytes_saved=job.get("bytes_saved") or 0)
+        if job["status"] == JOB_FAILED:
+            failed += 1
+    return 1 if failed else 0
+
+
+def cmd_generate(args):
+    from .gemini_generator import GeminiGenerator
+
+    prompts = read_items(args.prompts, args.prompts_file)
+    if not prompts:
+        emit_event("error", message="Nenhum prompt informado")
+        return 2
+
+    generator = GeminiGenerator()
+    if not generator.client:
+        emit_event("error", message="Cliente Gemini não inicializado (verifique GEMINI_API_KEY)")
+        return 1
+
+    db_manager = None if args.no_save and not args.cache else open_database(args)
+    if args.cache:
+        generator.enable_response_cache(db_manager)
+    if args.hedge:
+        generator.enable_hedging()
+
+    def on_result(prompt, result, seconds):
+        if isinstance(result, Exception):
+            emit_event("error", prompt=prompt, message=str(result))
+            return
+        if not args.no_save:
+            db_manager.save_roteiro(prompt, result)
+        emit_event("result", prompt=prompt, model=generator.model, saved=not args.no_save,
+                   seconds=round(seconds, 2), text=result)
+
+    summary = generator.generate_batch(prompts, args.concurrency, on_result=on_result, force=args.force)
+    emit_event("finished", model_health=generator.get_model_health(), **summary)
+    return 1 if summary["failed"] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="anunnakis_roteiros",
+        description="Scraping de imagens e geração de roteiros sem interface gráfica."
+    )
+    parser.add_argument("--db-dir", help="pasta do banco de dados (padrão: $ANUNNAKIS_DB_DIR ou src/db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape = subparsers.add_parser("scrape", help="baixa imagens para um ou mais termos")
+    scrape.add_argument("terms", nargs="*", help="termos de pesquisa")
+    scrape.add_argument("--terms-file", help="arquivo com um termo por linha ('-' para stdin)")
+    scrape.add_argument("--max-images", type=int, default=10)
+    scrape.add_argument("--high-res", action="store_true", help="exige imagens de 1080px ou mais")
+    scrape.add_argument("--image-dir", help="pasta onde salvar as imagens")
+    scrape.add_argument("--workers", type=int, default=None, help="workers de validação (padrão: nº de CPUs)")
+    scrape.add_argument("--pool", choices=["thread", "process"], default="thread")
+    scrape.add_argument("--downloader-threads", type=int, default=DEFAULT_DOWNLOADER_THREADS,
+                        help="threads de download por termo")
+    scrape.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST_LIMIT,
+                        help="downloads simultâneos por servidor")
+    scrape.add_argument("--max-connections", type=int, default=DEFAULT_GLOBAL_LIMIT,
+                        help="downloads simultâneos no total (todos os termos)")
+    scrape.add_argument("--timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help="timeout de leitura de cada download, em segundos")
+    scrape.add_argument("--queue", action="store_true",
+                        help="usa a fila persistente (retoma jobs interrompidos)")
+    scrape.add_argument("--concurrency", type=int, default=2, help="jobs simultâneos no modo fila")
+    scrape.add_argument("--log-level", choices=["info", "debug"], default="info",
+                        help="debug emite um evento por arquivo processado")
+    scrape.add_argument("--debug-log", help="grava o log completo (com DEBUG) neste arquivo, com rotação")
+    scrape.set_defaults(func=cmd_scrape)
+
+    generate = subparsers.add_parser("generate", help="gera roteiros com o Gemini")
+    generate.add_argument("prompts", nargs="*", help="temas dos roteiros")
+    generate.add_argument("--prompts-file", help="arquivo com um prompt por linha ('-' para stdin)")
+    generate.add_argument("--no-save", action="store_true", help="não salva os roteiros no BD")
+    generate.add_argument("--cache", action="store_true",
+                          help="reaproveita respostas já geradas para o mesmo prompt")
+    generate.add_argument("--force", action="store_true", help="ignora o cache e gera de novo")
+    generate.add_argument("--concurrency", type=int, default=1, help="roteiros gerados em paralelo")
+    generate.add_argument("--hedge", action="store_true",
+                          help="envia um pedido extra ao próximo modelo quando o principal demora")
+    generate.set_defaults(func=cmd_generate)
+
+    return parser
+
+
+def main(argv=None):
+    global _event_stream
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    args = build_parser().parse_args(argv)
+
+    # Mantém a saída padrão só com JSON: prints de diagnóstico vão para stderr
+    _event_stream = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
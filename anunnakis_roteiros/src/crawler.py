@@ -0,0 +1,173 @@
+"""Extensões do icrawler usadas pelo ImageScraper."""
+import contextlib
+import hashlib
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+from icrawler import ImageDownloader
+from icrawler.builtin.bing import BingParser
+
+from .http_pool import PooledSession
+
+_FIRST_PARAM_RE = re.compile(r'[?&]first=(\d+)')
+_IMAGE_EXTENSIONS = ("jpg", "jpeg", "png", "bmp", "tiff", "gif", "ppm", "pgm")
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Sufixo dos arquivos ainda sendo baixados (renomeados ao terminar)
+PARTIAL_SUFFIX = ".part"
+
+
+def file_index(file_name):
+    """Número de um arquivo nomeado pelo StreamingImageDownloader (0 se não for um deles)."""
+    stem = file_name.split(".", 1)[0]
+    return int(stem) if stem.isdigit() else 0
+
+
+class OffsetBingParser(BingParser):
+    """Parser do Bing que anota em cada resultado o offset (`first`) da página de origem.
+
+    Com isso o scraper sabe até onde a busca já foi percorrida e pode retomar um
+    job a partir dessa página em vez de recomeçar do zero.
+    """
+
+    def parse(self, response):
+        match = _FIRST_PARAM_RE.search(response.url or "")
+        page_offset = int(match.group(1)) if match else None
+        for task in super().parse(response):
+            task["page_offset"] = page_offset
+            yield task
+
+
+class StreamingImageDownloader(ImageDownloader):
+    """Downloader que avisa cada arquivo assim que ele termina de ser baixado.
+
+    O corpo da resposta é gravado em blocos direto no disco (nunca inteiro na
+    memória) e o MD5 é calculado durante o download. O arquivo só ganha o nome
+    final quando termina, então uma interrupção não deixa arquivos truncados.
+
+    O icrawler chama `process_meta` logo após cada download. Aqui repassamos o
+    caminho completo do arquivo e o MD5 para `on_file(caminho, md5)`, para que a
+    validação/deduplicação comece sem esperar o crawl inteiro.
+
+    Ganchos opcionais:
+    - `skip_url(url)`: se retornar True, a URL não é baixada (já tratada ou em
+      andamento em outra thread);
+    - `on_task(task)`: chamado para todo resultado tratado, baixado ou não,
+      antes de `on_file`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_file = None
+        self.skip_url = None
+        self.on_task = None
+        # Parada definitiva: vale também para os próximos crawl() (o icrawler
+        # zera o sinal reach_max_num a cada crawl)
+        self._stopped = threading.Event()
+        # A numeração continua entre os crawl() (páginas) do mesmo downloader; o
+        # icrawler recalcularia pelo que está na pasta, que é esvaziada ao mover
+        # ou apagar os arquivos já validados, repetindo nomes
+        self._next_idx = 0
+
+    def set_file_index(self, last_idx):
+        """Os próximos arquivos são numerados a partir de last_idx + 1."""
+        with self.lock:
+            self._next_idx = max(self._next_idx, last_idx)
+
+    def _next_filename(self, task, default_ext):
+        url_path = urlsplit(task["file_url"]).path
+        extension = url_path.rsplit(".", 1)[-1] if "." in url_path else default_ext
+        if extension.lower() not in _IMAGE_EXTENSIONS:
+            extension = default_ext
+        with self.lock:
+            self._next_idx += 1
+            return f"{self._next_idx:06d}.{extension}"
+
+    def _open_stream(self, url, timeout):
+        if isinstance(self.session, PooledSession):
+            # Mantém a vaga de concorrência até o corpo terminar de chegar
+            return self.session.stream(url)
+        return contextlib.closing(self.session.get(url, timeout=timeout, stream=True))
+
+    def download(self, task, default_ext, timeout=5, max_retry=3, overwrite=False, **kwargs):
+        file_url = task["file_url"]
+        task["success"] = False
+        task["filename"] = None
+        if self.skip_url is not None and self.skip_url(file_url):
+            task["skipped"] = True
+            return None
+
+        for _ in range(max_retry):
+            if self.reach_max_num():
+                self.signal.set(reach_max_num=True)
+                break
+            filename = self._next_filename(task, default_ext)
+            filepath = os.path.join(self.storage.root_dir, filename)
+            partial_path = filepath + PARTIAL_SUFFIX
+            try:
+                with self._open_stream(file_url, timeout) as response:
+                    if response.status_code != 200:
+                        self.logger.error("Response status code %d, file %s", response.status_code, file_url)
+                        break
+                    digest = hashlib.md5()
+                    with open(partial_path, "wb") as f:
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            # Ao fim da página (reach_max_num) os downloads em andamento
+                            # terminam e viram candidatas; só a parada do job os descarta
+                            if self._stopped.is_set():
+                                raise InterruptedError("crawler parado")
+                            digest.update(chunk)
+                            f.write(chunk)
+                os.replace(partial_path, filepath)
+            except InterruptedError:
+                self._discard(partial_path)
+                break
+            except Exception as e:
+                self._discard(partial_path)
+                self.logger.error("Exception caught when downloading file %s, error: %s", file_url, e)
+                continue
+
+            with self.lock:
+                self.fetched_num += 1
+                reached = self.max_num > 0 and self.fetched_num >= self.max_num
+            if reached:
+                self.signal.set(reach_max_num=True)
+            task["success"] = True
+            task["filename"] = filename
+            task["md5"] = digest.hexdigest()
+            return True
+        return None
+
+    @staticmethod
+    def _discard(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def process_meta(self, task):
+        if not task.get("success") and self.signal.get("reach_max_num"):
+            # Download abandonado porque o crawler foi parado: não é uma falha da URL
+            task["interrupted"] = True
+        if self.on_task is not None:
+            self.on_task(task)
+        if not task.get("success") or not task.get("filename"):
+            return
+        if self.on_file is None:
+            return
+        filepath = os.path.join(self.storage.root_dir, task["filename"])
+        self.on_file(filepath, task.get("md5"))
+
+    def start(self, *args, **kwargs):
+        if self._stopped.is_set():
+            self.signal.set(reach_max_num=True)
+        super().start(*args, **kwargs)
+
+    def stop(self):
+        """Pede ao crawler que pare: parser e downloaders saem no próximo ciclo."""
+        self._stopped.set()
+        self.signal.set(reach_max_num=True)
+
+    def is_stopped(self):
+        return self._stopped.is_set()
@@ -1,9 +1,66 @@
 import sqlite_utils
+import sqlite3
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+
+from .bloom_filter import BloomFilter
+from .roteiro_parser import roteiro_stats
+from .source_urls import SOURCE_ACCEPTED
+
+# Máximo de parâmetros por consulta "IN (...)" (limite seguro do SQLite)
+SQL_IN_BATCH = 500
+# Capacidade mínima do filtro de Bloom (cresce conforme a biblioteca de imagens)
+BLOOM_MIN_CAPACITY = 100_000
+# Maior inteiro do SQLite, usado como "sem limite" nas consultas
+_SQL_NO_LIMIT = 2 ** 63 - 1
+
+# Status dos jobs da fila de scraping
+JOB_PENDING = "pendente"
+JOB_RUNNING = "executando"
+JOB_DONE = "concluido"
+JOB_FAILED = "erro"
+# Job em execução sem batimento (heartbeat_at) há mais que isto: o processo dono morreu
+JOB_HEARTBEAT_STALE_SECONDS = 120
+
+# Situação de cada resultado da busca de um job (ver scrape_candidates)
+CANDIDATE_FAILED = "falhou"        # download não concluído
+CANDIDATE_DOWNLOADED = "baixada"   # na pasta temporária, aguardando validação
+CANDIDATE_ACCEPTED = "aceita"
+CANDIDATE_REJECTED = "rejeitada"
+
+
+def _to_digest(image_hash):
+    """Converte o hash hexadecimal (MD5) para os 16 bytes guardados no BD."""
+    if isinstance(image_hash, bytes):
+        return image_hash
+    try:
+        return bytes.fromhex(image_hash)
+    except ValueError:
+        # Hashes que não são hexadecimais (ex.: testes) são guardados como texto em bytes
+        return image_hash.encode('utf-8')
+
+
+# Colunas da lista de roteiros (sem o conteúdo)
+_ROTEIRO_LIST_COLUMNS = "id, title, created_at, scene_count, total_duration_seconds"
+
+
+def _roteiro_list_row(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "created_at": row[2],
+        "scene_count": row[3],
+        "total_duration_seconds": row[4]
+    }
+
 
 class DatabaseManager:
-    def __init__(self, db_path="anunnakis_data.db", base_dir=None):
+    # Arquivos de BD cujo schema já foi verificado neste processo
+    _initialized_files = set()
+    _initialized_lock = threading.Lock()
+
+    def __init__(self, db_path="anunnakis_data.db", base_dir=None, hash_batch_size=200):
         # Se base_dir não for fornecido, usa a pasta 'db' local
         if base_dir is None:
             base_dir = os.path.join(os.path.dirname(__file__), "db")
@@ -12,8 +69,57 @@ class DatabaseManager:
         self.db_file = os.path.join(base_dir, db_path)
         self.base_dir = base_dir  # Armazenar base_dir para criar novas instâncias
         os.makedirs(base_dir, exist_ok=True)
-        self.db = sqlite_utils.Database(self.db_file)
-        self._setup_database()
+
+        # Uma única conexão compartilhada entre threads (scraper, UI...),
+        # serializada pelo lock abaixo
+        self._lock = threading.RLock()
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
+        self.db = sqlite_utils.Database(conn)
+        self._configure_connection()
+
+        # Hashes aguardando gravação em lote (ver add_downloaded_hashes)
+        self.hash_batch_size = hash_batch_size
+        self._pending_hashes = {}
+        # Progresso dos jobs aguardando gravação no mesmo lote dos hashes:
+        # candidatas (job_id, url) -> (arquivo, status, data), vereditos de
+        # candidatas já gravadas, maior offset por job e URLs de origem
+        self._pending_candidates = {}
+        self._pending_verdicts = {}
+        self._pending_offsets = {}
+        self._pending_source_urls = {}
+
+        with DatabaseManager._initialized_lock:
+            key = os.path.abspath(self.db_file)
+            if key not in DatabaseManager._initialized_files:
+                self._setup_database()
+                DatabaseManager._initialized_files.add(key)
+
+        # Filtro de Bloom dos digests, persistido ao lado do arquivo do BD
+        self.bloom_file = self.db_file + ".bloom"
+        self._bloom = None
+        # Digests adicionados ao filtro desde a última vez que ele foi salvo
+        self._bloom_dirty = False
+        # Maior seq de image_hashes já aplicado ao filtro (lido antes de carregá-lo)
+        self._hashes_seq = self.image_hashes_seq()
+        self._load_bloom_filter()
+        # Outra conexão no mesmo arquivo (a CLI do cron com o app aberto, por
+        # exemplo) pode gravar hashes: o PRAGMA data_version muda a cada commit
+        # dela, e aí só os hashes novos (seq acima do visto) entram no filtro
+        # (ver _sync_other_connections)
+        self._data_version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        self._hashes_version = 0
+
+    def _configure_connection(self):
+        """Ajusta os pragmas: WAL evita um fsync por commit e permite leitura concorrente."""
+        try:
+            self.db.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError as e:
+            # Alguns sistemas de arquivos (rede/sincronizados) não suportam WAL
+            print(f"Aviso: WAL indisponível para {self.db_file}: {e}")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-16000")  # ~16MB
+        self.db.execute("PRAGMA busy_timeout=30000")
 
     def _setup_database(self):
         # Tabela para armazenar os roteiros
@@ -24,47 +130,759 @@ class DatabaseManager:
             "created_at": str
         }, pk="id", if_not_exists=True)
 
-        # Tabela para armazenar os hashes das imagens baixadas
-        self.db["image_hashes"].create({
-            "hash": str,
+        # Estrutura do roteiro (ver roteiro_parser) para a biblioteca não reprocessar o texto
+        roteiro_columns = self.db["roteiros"].columns_dict
+        if "scene_count" not in roteiro_columns:
+            self.db["roteiros"].add_column("scene_count", int)
+        if "total_duration_seconds" not in roteiro_columns:
+            self.db["roteiros"].add_column("total_duration_seconds", int)
+        self._backfill_roteiro_stats()
+
+        # Índice de busca textual (FTS5) sobre título e conteúdo, sincronizado
+        # por triggers; bancos antigos são indexados na primeira abertura
+        if not self.db["roteiros_fts"].exists():
+            try:
+                self.db["roteiros"].enable_fts(
+                    ["title", "content"], create_triggers=True,
+                    tokenize="unicode61 remove_diacritics 2"
+                )
+            except sqlite3.OperationalError as e:
+                print(f"Aviso: busca FTS5 indisponível: {e}")
+
+        # Tabela para armazenar os hashes das imagens baixadas.
+        # O MD5 é guardado como BLOB de 16 bytes (metade do hex em TEXT).
+        if not self.db["image_hashes"].exists():
+            self._create_image_hashes_table("image_hashes")
+        else:
+            # Bancos criados antes do hash perceptual não têm a coluna 'phash'
+            if "phash" not in self.db["image_hashes"].columns_dict:
+                self.db["image_hashes"].add_column("phash", str)
+            if self.db["image_hashes"].columns_dict["hash"] is not bytes:
+                self._migrate_image_hashes_to_blob()
+            # Caminho do arquivo salvo (galeria); bancos antigos são preenchidos pela galeria
+            if "file_path" not in self.db["image_hashes"].columns_dict:
+                self.db["image_hashes"].add_column("file_path", str)
+            # Ordem de gravação, para outras conexões lerem só os hashes novos
+            if "seq" not in self.db["image_hashes"].columns_dict:
+                self.db["image_hashes"].add_column("seq", int)
+        self.db["image_hashes"].create_index(["seq"], if_not_exists=True)
+        # Galeria: imagens por termo, das mais novas para as mais antigas
+        self.db["image_hashes"].create_index(["term", "downloaded_at"], if_not_exists=True)
+        self.db["image_hashes"].create_index(["downloaded_at"], if_not_exists=True)
+
+        # Fila persistente de jobs de scraping (um termo por job)
+        self.db["scrape_jobs"].create({
+            "id": int,
+            "term": str,
+            "max_images": int,
+            "high_res": int,
+            "status": str,
+            "saved_count": int,
+            "message": str,
+            "crawl_offset": int,
+            "created_at": str,
+            "updated_at": str
+        }, pk="id", if_not_exists=True)
+        self.db["scrape_jobs"].create_index(["status"], if_not_exists=True)
+        # Offset da busca já percorrido, para retomar o job de onde parou
+        if "crawl_offset" not in self.db["scrape_jobs"].columns_dict:
+            self.db["scrape_jobs"].add_column("crawl_offset", int)
+        # Bytes que deixaram de ser baixados por URLs já conhecidas (ver source_urls)
+        if "bytes_saved" not in self.db["scrape_jobs"].columns_dict:
+            self.db["scrape_jobs"].add_column("bytes_saved", int)
+        # Processo (fila) que está executando o job e o último batimento dele; a
+        # GUI e a CLI do cron podem usar a mesma fila ao mesmo tempo
+        if "owner" not in self.db["scrape_jobs"].columns_dict:
+            self.db["scrape_jobs"].add_column("owner", str)
+        if "heartbeat_at" not in self.db["scrape_jobs"].columns_dict:
+            self.db["scrape_jobs"].add_column("heartbeat_at", str)
+
+        # Resultados da busca já tratados por job (URL, arquivo temporário e veredito)
+        self.db["scrape_candidates"].create({
+            "job_id": int,
+            "url": str,
+            "file_name": str,
+            "status": str,
+            "updated_at": str
+        }, pk=("job_id", "url"), if_not_exists=True)
+        self.db["scrape_candidates"].create_index(["job_id", "file_name"], if_not_exists=True)
+
+        # URLs de origem (normalizadas) já baixadas e o veredito, para não baixá-las de novo
+        self.db["source_urls"].create({
+            "url": str,
             "term": str,
-            "downloaded_at": str
-        }, pk="hash", if_not_exists=True)
+            "status": str,
+            "size_bytes": int,
+            "max_dimension": int,
+            "seen_at": str
+        }, pk="url", if_not_exists=True)
+        self.db["source_urls"].create_index(["term", "status"], if_not_exists=True)
+
+        # Offset de busca alcançado por termo (a próxima busca começa daí)
+        self.db["term_stats"].create({
+            "term": str,
+            "last_offset": int,
+            "updated_at": str
+        }, pk="term", if_not_exists=True)
+
+        # Cache de respostas do Gemini (chave = SHA-256 de modelo, instrução, prompt e config)
+        self.db["gemini_cache"].create({
+            "key": str,
+            "model": str,
+            "prompt": str,
+            "response": str,
+            "size_bytes": int,
+            "created_at": str,
+            "last_used_at": str
+        }, pk="key", if_not_exists=True)
+        self.db["gemini_cache"].create_index(["last_used_at"], if_not_exists=True)
+
+    def _backfill_roteiro_stats(self):
+        """Calcula cenas e duração dos roteiros salvos antes dessas colunas existirem."""
+        cursor = self.db.execute("SELECT id, content FROM roteiros WHERE scene_count IS NULL")
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            with self.db.conn:
+                self.db.conn.executemany(
+                    "UPDATE roteiros SET scene_count = ?, total_duration_seconds = ? WHERE id = ?",
+                    [(*roteiro_stats(content or ""), roteiro_id) for roteiro_id, content in rows]
+                )
+
+    def _create_image_hashes_table(self, name):
+        self.db.execute(f"""
+            CREATE TABLE [{name}] (
+                [hash] BLOB PRIMARY KEY,
+                [term] TEXT,
+                [downloaded_at] TEXT,
+                [phash] TEXT,
+                [file_path] TEXT,
+                [seq] INTEGER
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_image_hashes_to_blob(self):
+        """Converte bancos antigos (hash em TEXT hexadecimal) para digests BLOB."""
+        print("Migrando image_hashes para digests binários...")
+        with self.db.conn:
+            self.db.execute("DROP TABLE IF EXISTS [image_hashes_blob]")
+            self._create_image_hashes_table("image_hashes_blob")
+            cursor = self.db.execute("SELECT hash, term, downloaded_at, phash FROM image_hashes")
+            while True:
+                rows = cursor.fetchmany(10_000)
+                if not rows:
+                    break
+                self.db.conn.executemany(
+                    "INSERT OR REPLACE INTO image_hashes_blob (hash, term, downloaded_at, phash) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(_to_digest(row[0]), row[1], row[2], row[3]) for row in rows]
+                )
+            self.db.execute("DROP TABLE image_hashes")
+            self.db.execute("ALTER TABLE image_hashes_blob RENAME TO image_hashes")
+
+    def _load_bloom_filter(self):
+        """Carrega o filtro de Bloom do disco; reconstrói a partir do BD se estiver desatualizado."""
+        with self._lock:
+            stored = self.db.execute("SELECT count(*) FROM image_hashes").fetchone()[0]
+            bloom = BloomFilter.load(self.bloom_file)
+            if bloom is None or bloom.count != stored or bloom.is_full():
+                bloom = self._rebuild_bloom_filter(stored)
+            self._bloom = bloom
+            self._bloom_dirty = False
+
+    def image_hashes_seq(self):
+        """Maior seq gravado em image_hashes (0 se nenhum)."""
+        with self._lock:
+            return self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM image_hashes").fetchone()[0]
+
+    def _sync_other_connections(self):
+        """Aplica ao filtro os hashes que outra conexão gravou desde a última consulta.
+
+        Sem isso um "não está no filtro" seria tomado como definitivo para
+        hashes salvos por outro processo. Só as linhas com seq acima do último
+        visto são lidas; o arquivo .bloom é salvo no próximo flush_hashes().
+        Chamar com self._lock.
+        """
+        version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        rows = self.db.execute(
+            "SELECT hash, seq FROM image_hashes WHERE seq > ?", [self._hashes_seq]
+        ).fetchall()
+        if not rows:
+            return
+        for digest, seq in rows:
+            self._hashes_seq = max(self._hashes_seq, seq)
+            # Linhas regravadas (INSERT OR REPLACE) ganham seq novo, mas já estão no filtro
+            if digest not in self._bloom:
+                self._bloom.add(digest)
+                self._bloom_dirty = True
+        self._hashes_version += 1
+
+    def image_hashes_version(self):
+        """Número que muda quando outra conexão grava hashes (para caches montados a partir do BD)."""
+        with self._lock:
+            self._sync_other_connections()
+            return self._hashes_version
+
+    def phashes_since(self, seq):
+        """(hash, phash) gravados com seq acima de `seq` e o maior seq visto."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT hash, phash, seq FROM image_hashes WHERE seq > ?", [seq]
+            ).fetchall()
+        last_seq = max((row[2] for row in rows), default=seq)
+        return [(row[0].hex(), row[1]) for row in rows if row[1] is not None], last_seq
+
+    def _rebuild_bloom_filter(self, stored):
+        bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, stored * 2))
+        cursor = self.db.execute("SELECT hash FROM image_hashes")
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                break
+            for row in rows:
+                bloom.add(row[0])
+        bloom.save(self.bloom_file)
+        return bloom
 
     # --- Métodos para Roteiros ---
 
     def save_roteiro(self, title, content):
         """Salva um novo roteiro no banco de dados."""
-        self.db["roteiros"].insert({
-            "title": title,
-            "content": content,
-            "created_at": datetime.now().isoformat()
-        })
+        scene_count, total_duration = roteiro_stats(content)
+        with self._lock:
+            self.db["roteiros"].insert({
+                "title": title,
+                "content": content,
+                "created_at": datetime.now().isoformat(),
+                "scene_count": scene_count,
+                "total_duration_seconds": total_duration
+            })
 
     def get_all_roteiros(self):
         """Retorna todos os roteiros salvos."""
-        return list(self.db["roteiros"].rows)
+        with self._lock:
+            return list(self.db["roteiros"].rows)
+
+    def list_roteiros(self, limit=200, before_id=None):
+        """Página da lista de roteiros (id, title, created_at, scene_count,
+        total_duration_seconds), do mais novo para o mais antigo.
+
+        Paginação por chave: passe o menor id da página anterior em before_id.
+        O conteúdo não é carregado (ver get_roteiro).
+        """
+        with self._lock:
+            if before_id is None:
+                cursor = self.db.execute(
+                    f"SELECT {_ROTEIRO_LIST_COLUMNS} FROM roteiros ORDER BY id DESC LIMIT ?", [limit]
+                )
+            else:
+                cursor = self.db.execute(
+                    f"SELECT {_ROTEIRO_LIST_COLUMNS} FROM roteiros WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    [before_id, limit]
+                )
+            return [_roteiro_list_row(row) for row in cursor.fetchall()]
+
+    def get_roteiro(self, roteiro_id):
+        """Retorna o roteiro completo pelo id (ou None)."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT id, title, content, created_at FROM roteiros WHERE id = ?", [roteiro_id]
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "title": row[1], "content": row[2], "created_at": row[3]}
+
+    def search_roteiros(self, query, limit=50):
+        """Busca textual nos roteiros, do mais relevante para o menos (título pesa mais).
+
+        Cada resultado traz id, title, created_at e um trecho do conteúdo com os
+        termos encontrados entre « ». O conteúdo completo não é carregado.
+        """
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+        with self._lock:
+            if not self.db["roteiros_fts"].exists():
+                # Sem FTS5: busca simples só pelo título
+                cursor = self.db.execute(
+                    f"SELECT {_ROTEIRO_LIST_COLUMNS}, '' FROM roteiros WHERE title LIKE ? "
+                    "ORDER BY id DESC LIMIT ?", [f"%{query.strip()}%", limit]
+                )
+            else:
+                cursor = self.db.execute("""
+                    SELECT roteiros.id, roteiros.title, roteiros.created_at,
+                           roteiros.scene_count, roteiros.total_duration_seconds,
+                           snippet(roteiros_fts, 1, '«', '»', '…', 16)
+                    FROM roteiros_fts
+                    JOIN roteiros ON roteiros.id = roteiros_fts.rowid
+                    WHERE roteiros_fts MATCH ?
+                    ORDER BY bm25(roteiros_fts, 10.0, 1.0)
+                    LIMIT ?
+                """, [fts_query, limit])
+            return [dict(_roteiro_list_row(row), snippet=row[5]) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _fts_query(query):
+        """Converte o texto digitado numa consulta FTS5 segura (todas as palavras, por prefixo)."""
+        words = [word.replace('"', '') for word in query.split()]
+        return " ".join(f'"{word}"*' for word in words if word)
+
+    def count_roteiros(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM roteiros").fetchone()[0]
+
+    # --- Métodos para o Cache de Respostas do Gemini ---
+
+    def get_cached_response(self, key, max_age_seconds=None):
+        """Retorna a resposta guardada para a chave (ou None) e marca o uso para a evicção LRU."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT response, created_at FROM gemini_cache WHERE key = ?", [key]
+            ).fetchone()
+            if row is None:
+                return None
+            if max_age_seconds is not None:
+                age = datetime.now() - datetime.fromisoformat(row[1])
+                if age.total_seconds() > max_age_seconds:
+                    return None
+            with self.db.conn:
+                self.db.conn.execute(
+                    "UPDATE gemini_cache SET last_used_at = ? WHERE key = ?",
+                    [datetime.now().isoformat(), key]
+                )
+            return row[0]
+
+    def save_cached_response(self, key, model, prompt, response):
+        now = datetime.now().isoformat()
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.execute(
+                    "INSERT OR REPLACE INTO gemini_cache "
+                    "(key, model, prompt, response, size_bytes, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [key, model, prompt, response, len(response.encode('utf-8')), now, now]
+                )
+
+    def prune_response_cache(self, max_entries=None, max_bytes=None, max_age_seconds=None):
+        """Remove respostas expiradas e, depois, as menos usadas além dos limites. Retorna quantas."""
+        removed = 0
+        with self._lock:
+            with self.db.conn:
+                if max_age_seconds is not None:
+                    cutoff = datetime.fromtimestamp(datetime.now().timestamp() - max_age_seconds)
+                    removed += self.db.conn.execute(
+                        "DELETE FROM gemini_cache WHERE created_at < ?", [cutoff.isoformat()]
+                    ).rowcount
+                if max_entries is not None or max_bytes is not None:
+                    removed += self.db.conn.execute("""
+                        DELETE FROM gemini_cache WHERE key IN (
+                            SELECT key FROM (
+                                SELECT key,
+                                       ROW_NUMBER() OVER (ORDER BY last_used_at DESC) AS n,
+                                       SUM(size_bytes) OVER (ORDER BY last_used_at DESC) AS total
+                                FROM gemini_cache
+                            ) WHERE n > ? OR total > ?
+                        )
+                    """, [_SQL_NO_LIMIT if max_entries is None else max_entries,
+                          _SQL_NO_LIMIT if max_bytes is None else max_bytes]).rowcount
+        return removed
+
+    def clear_response_cache(self):
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.execute("DELETE FROM gemini_cache")
 
     # --- Métodos para Hashes de Imagens ---
 
     def is_hash_downloaded(self, image_hash):
         """Verifica se um hash de imagem já foi baixado."""
-        try:
-            return self.db["image_hashes"].get(image_hash) is not None
-        except Exception as e:
-            # sqlite-utils raises a NotFoundError when a primary key is not present.
-            # Handle that case as 'not downloaded' instead of letting the exception propagate.
-            if e.__class__.__name__ == 'NotFoundError':
+        digest = _to_digest(image_hash)
+        with self._lock:
+            if digest in self._pending_hashes:
+                return True
+            self._sync_other_connections()
+            # "Com certeza nunca vi": nem consulta o SQLite
+            if digest not in self._bloom:
                 return False
-            raise
+            row = self.db.execute(
+                "SELECT 1 FROM image_hashes WHERE hash = ?", [digest]
+            ).fetchone()
+            return row is not None
 
-    def add_downloaded_hash(self, image_hash, term):
+    def is_hash_downloaded_many(self, image_hashes):
+        """Retorna o conjunto dos hashes (dentre os informados) que já foram baixados."""
+        by_digest = {_to_digest(h): h for h in image_hashes}
+        with self._lock:
+            self._sync_other_connections()
+            found = {h for d, h in by_digest.items() if d in self._pending_hashes}
+            maybe = [d for d in by_digest if d not in self._pending_hashes and d in self._bloom]
+            for start in range(0, len(maybe), SQL_IN_BATCH):
+                batch = maybe[start:start + SQL_IN_BATCH]
+                placeholders = ", ".join("?" for _ in batch)
+                for row in self.db.execute(
+                    f"SELECT hash FROM image_hashes WHERE hash IN ({placeholders})", batch
+                ):
+                    found.add(by_digest[row[0]])
+            return found
+
+    def add_downloaded_hash(self, image_hash, term, phash=None, file_path=None):
         """Adiciona um novo hash de imagem baixada ao banco de dados."""
-        self.db["image_hashes"].insert({
-            "hash": image_hash,
-            "term": term,
-            "downloaded_at": datetime.now().isoformat()
-        }, pk="hash", replace=True)
+        self.add_downloaded_hashes([(image_hash, term, phash, file_path)])
+        self.flush_hashes()
+
+    def add_downloaded_hashes(self, records):
+        """Adiciona hashes ao buffer de gravação; grava em lote ao atingir hash_batch_size.
+
+        `records` é uma lista de (hash, termo, phash) ou (hash, termo, phash,
+        caminho do arquivo salvo). Hashes no buffer já contam para
+        is_hash_downloaded. Chame flush_hashes() ao terminar o job.
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            for record in records:
+                image_hash, term, phash = record[:3]
+                file_path = record[3] if len(record) > 3 else None
+                digest = _to_digest(image_hash)
+                self._pending_hashes[digest] = (digest, term, now, phash, file_path)
+            self._flush_if_full()
+
+    def _pending_count(self):
+        return (len(self._pending_hashes) + len(self._pending_candidates) + len(self._pending_verdicts)
+                + len(self._pending_source_urls))
+
+    def _flush_if_full(self):
+        if self._pending_count() >= self.hash_batch_size:
+            self.flush_hashes(persist_bloom=False)
+
+    def flush_hashes(self, persist_bloom=True):
+        """Grava numa única transação os hashes e o progresso dos jobs em buffer e atualiza o filtro de Bloom."""
+        with self._lock:
+            self._sync_other_connections()
+            new_digests = []
+            if self._pending_hashes:
+                new_digests = [
+                    digest for digest in self._pending_hashes
+                    if digest not in self._bloom or not self.db.execute(
+                        "SELECT 1 FROM image_hashes WHERE hash = ?", [digest]
+                    ).fetchone()
+                ]
+            if self._pending_count() or self._pending_offsets:
+                with self.db.conn:
+                    if self._pending_hashes:
+                        # O seq é calculado dentro do INSERT, que já tem a trava de escrita do
+                        # arquivo: é único e crescente entre processos
+                        self.db.conn.executemany(
+                            "INSERT OR REPLACE INTO image_hashes (hash, term, downloaded_at, phash, file_path, seq) "
+                            "VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM image_hashes))",
+                            list(self._pending_hashes.values())
+                        )
+                    self._write_pending_progress()
+                self._pending_hashes.clear()
+            if new_digests:
+                if self._bloom.count + len(new_digests) > self._bloom.capacity:
+                    # Filtro lotado: reconstrói com o dobro da capacidade (já inclui os novos)
+                    stored = self.db.execute("SELECT count(*) FROM image_hashes").fetchone()[0]
+                    self._bloom = self._rebuild_bloom_filter(stored)
+                    self._bloom_dirty = False
+                else:
+                    for digest in new_digests:
+                        self._bloom.add(digest)
+                    self._bloom_dirty = self._bloom_dirty or bool(new_digests)
+            # O arquivo .bloom fica na pasta sincronizada: só é regravado se mudou
+            if persist_bloom and self._bloom_dirty:
+                self._bloom.save(self.bloom_file)
+                self._bloom_dirty = False
+
+    def _write_pending_progress(self):
+        """Grava candidatas, vereditos, offsets e URLs de origem do buffer (dentro da transação)."""
+        if self._pending_candidates:
+            self.db.conn.executemany(
+                "INSERT OR REPLACE INTO scrape_candidates (job_id, url, file_name, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(*key, *row) for key, row in self._pending_candidates.items()]
+            )
+        if self._pending_verdicts:
+            self.db.conn.executemany(
+                "UPDATE scrape_candidates SET status = ?, updated_at = ? WHERE job_id = ? AND url = ?",
+                [(*row, *key) for key, row in self._pending_verdicts.items()]
+            )
+        if self._pending_offsets:
+            self.db.conn.executemany(
+                "UPDATE scrape_jobs SET crawl_offset = MAX(COALESCE(crawl_offset, 0), ?) WHERE id = ?",
+                [(offset, job_id) for job_id, offset in self._pending_offsets.items()]
+            )
+        if self._pending_source_urls:
+            # Uma URL já aceita mantém o veredito (outro download dela seria só duplicado)
+            self.db.conn.executemany(
+                "INSERT INTO source_urls (url, term, status, size_bytes, max_dimension, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET term = excluded.term, "
+                "status = excluded.status, size_bytes = excluded.size_bytes, "
+                "max_dimension = excluded.max_dimension, seen_at = excluded.seen_at "
+                "WHERE source_urls.status != ?",
+                [(*row, SOURCE_ACCEPTED) for row in self._pending_source_urls.values()]
+            )
+        self._pending_candidates.clear()
+        self._pending_verdicts.clear()
+        self._pending_offsets.clear()
+        self._pending_source_urls.clear()
+
+    def _flush_progress(self):
+        """Grava o progresso dos jobs em buffer antes de uma leitura que depende dele."""
+        with self._lock:
+            if self._pending_candidates or self._pending_verdicts or self._pending_offsets \
+                    or self._pending_source_urls:
+                with self.db.conn:
+                    self._write_pending_progress()
+
+    # --- Métodos da Galeria ---
+
+    def list_image_terms(self):
+        """Termos com imagens salvas e a quantidade de cada um (sem os hashes ainda no buffer)."""
+        with self._lock:
+            return self.db.execute(
+                "SELECT term, COUNT(*) FROM image_hashes GROUP BY term ORDER BY term"
+            ).fetchall()
+
+    def list_images(self, term=None, limit=200, before=None):
+        """Página de imagens salvas (da mais nova para a mais antiga), sem carregar phash.
+
+        Paginação por chave: `before` é o par (downloaded_at, hash) da última
+        imagem da página anterior. Cada item traz hash (hex), term, file_path e
+        downloaded_at; file_path é None em imagens salvas antes dessa coluna.
+        Hashes ainda no buffer aparecem depois do próximo flush_hashes().
+        """
+        conditions, params = [], []
+        if term is not None:
+            conditions.append("term = ?")
+            params.append(term)
+        if before is not None:
+            conditions.append("(downloaded_at, hash) < (?, ?)")
+            params.extend([before[0], _to_digest(before[1])])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT hash, term, file_path, downloaded_at FROM image_hashes {where} "
+                "ORDER BY downloaded_at DESC, hash DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [
+            {"hash": row[0].hex(), "term": row[1], "file_path": row[2], "downloaded_at": row[3]}
+            for row in rows
+        ]
+
+    def set_image_file_paths(self, pairs):
+        """Grava o caminho do arquivo de imagens antigas: lista de (hash, caminho)."""
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.executemany(
+                    "UPDATE image_hashes SET file_path = ? WHERE hash = ?",
+                    [(path, _to_digest(image_hash)) for image_hash, path in pairs]
+                )
+
+    def iter_phashes(self):
+        """Itera sobre (hash, phash) de todas as imagens com hash perceptual, inclusive as do buffer."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT hash, phash FROM image_hashes WHERE phash IS NOT NULL"
+            ).fetchall()
+            rows.extend((row[0], row[3]) for row in self._pending_hashes.values() if row[3] is not None)
+        for row in rows:
+            yield row[0].hex(), row[1]
+
+    # --- Métodos para a Fila de Scraping ---
+
+    def add_scrape_jobs(self, terms, max_images, high_res):
+        """Adiciona um job pendente por termo. Retorna os ids criados."""
+        now = datetime.now().isoformat()
+        ids = []
+        with self._lock:
+            with self.db.conn:
+                for term in terms:
+                    cursor = self.db.conn.execute(
+                        "INSERT INTO scrape_jobs (term, max_images, high_res, status, saved_count, "
+                        "message, crawl_offset, bytes_saved, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, 0, '', 0, 0, ?, ?)",
+                        [term, max_images, int(bool(high_res)), JOB_PENDING, now, now]
+                    )
+                    ids.append(cursor.lastrowid)
+        return ids
+
+    def get_scrape_jobs(self):
+        """Retorna todos os jobs da fila, do mais antigo para o mais novo."""
+        with self._lock:
+            return list(self.db["scrape_jobs"].rows_where(order_by="id"))
+
+    def get_scrape_job(self, job_id):
+        with self._lock:
+            self._flush_progress()
+            rows = list(self.db["scrape_jobs"].rows_where("id = ?", [job_id]))
+        return rows[0] if rows else None
+
+    def claim_next_scrape_job(self, owner=None):
+        """Marca o próximo job pendente como em execução por `owner` e o retorna (ou None).
+
+        O UPDATE só vale se o job ainda estiver pendente: se outro processo o
+        pegou entre a consulta e o UPDATE, tenta o próximo.
+        """
+        with self._lock:
+            while True:
+                row = self.db.execute(
+                    "SELECT id FROM scrape_jobs WHERE status = ? ORDER BY id LIMIT 1", [JOB_PENDING]
+                ).fetchone()
+                if row is None:
+                    return None
+                now = datetime.now().isoformat()
+                with self.db.conn:
+                    cursor = self.db.conn.execute(
+                        "UPDATE scrape_jobs SET status = ?, owner = ?, heartbeat_at = ?, updated_at = ? "
+                        "WHERE id = ? AND status = ?", [JOB_RUNNING, owner, now, now, row[0], JOB_PENDING]
+                    )
+                if cursor.rowcount == 1:
+                    return self.get_scrape_job(row[0])
+
+    def touch_scrape_jobs(self, owner):
+        """Renova o batimento dos jobs em execução por `owner`."""
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.execute(
+                    "UPDATE scrape_jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                    [datetime.now().isoformat(), owner, JOB_RUNNING]
+                )
+
+    def update_scrape_job(self, job_id, **fields):
+        """Atualiza campos de um job (status, saved_count, message...)."""
+        fields["updated_at"] = datetime.now().isoformat()
+        with self._lock:
+            self.db["scrape_jobs"].update(job_id, fields)
+
+    def reset_interrupted_scrape_jobs(self, stale_after=JOB_HEARTBEAT_STALE_SECONDS):
+        """Volta para pendente os jobs em execução cujo processo parou de dar sinal.
+
+        Jobs com batimento recente pertencem a outro processo vivo (a CLI do
+        cron com o app aberto, por exemplo) e não são tocados.
+        """
+        now = datetime.now()
+        stale = (now - timedelta(seconds=stale_after)).isoformat()
+        with self._lock:
+            with self.db.conn:
+                cursor = self.db.conn.execute(
+                    "UPDATE scrape_jobs SET status = ?, owner = NULL, updated_at = ? "
+                    "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                    [JOB_PENDING, now.isoformat(), JOB_RUNNING, stale]
+                )
+            return cursor.rowcount
+
+    def clear_finished_scrape_jobs(self):
+        """Remove da fila os jobs concluídos."""
+        with self._lock:
+            self._flush_progress()
+            with self.db.conn:
+                self.db.conn.execute(
+                    "DELETE FROM scrape_candidates WHERE job_id IN "
+                    "(SELECT id FROM scrape_jobs WHERE status = ?)", [JOB_DONE]
+                )
+                self.db.conn.execute("DELETE FROM scrape_jobs WHERE status = ?", [JOB_DONE])
+
+    # --- Métodos para Retomar Jobs ---
+
+    def record_scrape_candidate(self, job_id, url, status, file_name=None, page_offset=None):
+        """Registra um resultado tratado pelo downloader e avança o crawl_offset do job.
+
+        Fica no buffer e é gravado no lote de flush_hashes().
+        """
+        with self._lock:
+            self._pending_verdicts.pop((job_id, url), None)
+            self._pending_candidates[(job_id, url)] = (file_name, status, datetime.now().isoformat())
+            if page_offset is not None:
+                self._pending_offsets[job_id] = max(self._pending_offsets.get(job_id, 0), page_offset)
+            self._flush_if_full()
+
+    def set_scrape_candidate_status(self, job_id, url, status):
+        """Grava (no buffer) o veredito do arquivo baixado de `url` pelo job."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            pending = self._pending_candidates.get((job_id, url))
+            if pending is not None:
+                self._pending_candidates[(job_id, url)] = (pending[0], status, now)
+            else:
+                self._pending_verdicts[(job_id, url)] = (status, now)
+            self._flush_if_full()
+
+    def get_scrape_candidates(self, job_id):
+        """Resultados já tratados pelo job: lista de (url, file_name, status)."""
+        with self._lock:
+            self._flush_progress()
+            return self.db.execute(
+                "SELECT url, file_name, status FROM scrape_candidates WHERE job_id = ?", [job_id]
+            ).fetchall()
+
+    def clear_scrape_candidates(self, job_id):
+        with self._lock:
+            self._flush_progress()
+            with self.db.conn:
+                self.db.conn.execute("DELETE FROM scrape_candidates WHERE job_id = ?", [job_id])
+
+    def add_scrape_job_bytes_saved(self, job_id, size_bytes):
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.execute(
+                    "UPDATE scrape_jobs SET bytes_saved = COALESCE(bytes_saved, 0) + ? WHERE id = ?",
+                    [size_bytes, job_id]
+                )
+
+    # --- Métodos para Estatísticas por Termo ---
+
+    def get_term_stats(self, term):
+        """Offset alcançado e histórico de aproveitamento do termo.
+
+        Retorna {"last_offset", "accepted", "total"}; accepted/total vêm das URLs
+        já baixadas para o termo (source_urls).
+        """
+        with self._lock:
+            self._flush_progress()
+            row = self.db.execute("SELECT last_offset FROM term_stats WHERE term = ?", [term]).fetchone()
+            total, accepted = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status = ?), 0) FROM source_urls WHERE term = ?",
+                [SOURCE_ACCEPTED, term]
+            ).fetchone()
+        return {"last_offset": row[0] if row else 0, "accepted": accepted, "total": total}
+
+    def set_term_last_offset(self, term, offset):
+        with self._lock:
+            with self.db.conn:
+                self.db.conn.execute(
+                    "INSERT OR REPLACE INTO term_stats (term, last_offset, updated_at) VALUES (?, ?, ?)",
+                    [term, offset, datetime.now().isoformat()]
+                )
+
+    # --- Métodos para URLs de Origem ---
+
+    def get_source_url(self, url):
+        """Retorna (status, size_bytes, max_dimension) de uma URL normalizada já vista, ou None."""
+        with self._lock:
+            pending = self._pending_source_urls.get(url)
+            if pending is not None:
+                return pending[2:5]
+            return self.db.execute(
+                "SELECT status, size_bytes, max_dimension FROM source_urls WHERE url = ?", [url]
+            ).fetchone()
+
+    def add_source_urls(self, rows):
+        """Grava URLs vistas: lista de (url, term, status, size_bytes, max_dimension).
+
+        Fica no buffer e é gravado no lote de flush_hashes().
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            for row in rows:
+                pending = self._pending_source_urls.get(row[0])
+                if pending is not None and pending[2] == SOURCE_ACCEPTED and row[2] != SOURCE_ACCEPTED:
+                    continue
+                self._pending_source_urls[row[0]] = (*row, now)
+            self._flush_if_full()
 
 if __name__ == '__main__':
     # Exemplo de uso
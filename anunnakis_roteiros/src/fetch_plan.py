@@ -0,0 +1,93 @@
+"""Planejamento das páginas de resultados pedidas ao Bing.
+
+Em vez de pedir de uma vez `max_images * 10` resultados a partir do offset 0,
+o scraper pede páginas pequenas e decide o tamanho da próxima pela taxa de
+aproveitamento do termo (histórico em `source_urls` + o que já foi visto nesta
+execução). O offset alcançado fica salvo por termo, então a próxima busca do
+mesmo termo começa mais fundo nos resultados.
+Não depende de Qt nem do icrawler.
+"""
+import math
+
+# O Bing não devolve resultados além do offset 1000
+BING_MAX_OFFSET = 1000
+# O feeder do icrawler pede os resultados de 20 em 20
+BING_PAGE_STEP = 20
+
+MIN_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 150
+# Taxa inicial para termos sem histórico: 2 aceitas em 4 (50%)
+PRIOR_ACCEPTED = 2
+PRIOR_TOTAL = 4
+MIN_ACCEPT_RATE = 0.05
+SAFETY_MARGIN = 1.25
+# Limite de downloads por execução (o mesmo multiplicador usado antes)
+MAX_FETCH_MULTIPLIER = 10
+
+
+class FetchPlan:
+    """Decide offset e tamanho de cada página de downloads de uma execução.
+
+    `saved` e `processed` (e add_verdict) são atualizados pela thread que
+    valida as imagens; next_page() e page_done() são chamados pela thread do
+    crawl.
+    """
+
+    def __init__(self, max_images, start_offset=0, history_accepted=0, history_total=0):
+        self.max_images = max_images
+        self.offset = start_offset
+        self.history_accepted = history_accepted
+        self.history_total = history_total
+        self.budget = max(max_images * MAX_FETCH_MULTIPLIER, MIN_PAGE_SIZE)
+        self.downloaded = 0
+        self.saved = 0
+        self.processed = 0
+        # Vereditos desta execução que entram na taxa: um por URL de origem
+        self.rated_accepted = 0
+        self.rated_total = 0
+        self._rated_urls = set()
+
+    def add_verdict(self, url, accepted):
+        """Conta um veredito na taxa de aproveitamento; só o primeiro de cada URL vale."""
+        if url is not None:
+            if url in self._rated_urls:
+                return
+            self._rated_urls.add(url)
+        self.rated_total += 1
+        if accepted:
+            self.rated_accepted += 1
+
+    def accept_rate(self):
+        accepted = self.history_accepted + self.rated_accepted + PRIOR_ACCEPTED
+        total = self.history_total + self.rated_total + PRIOR_TOTAL
+        return max(MIN_ACCEPT_RATE, accepted / total)
+
+    def next_page(self):
+        """Retorna (offset, tamanho) da próxima página, ou None se não há mais o que pedir."""
+        remaining = self.max_images - self.saved
+        if remaining <= 0 or self.offset >= BING_MAX_OFFSET or self.downloaded >= self.budget:
+            return None
+        size = math.ceil(remaining / self.accept_rate() * SAFETY_MARGIN)
+        size = min(max(size, MIN_PAGE_SIZE), MAX_PAGE_SIZE)
+        size = min(size, BING_MAX_OFFSET - self.offset, self.budget - self.downloaded)
+        return self.offset, size
+
+    def page_done(self, offset, size, downloaded, last_page_offset=None, stopped=False):
+        """Avança o offset depois de uma página.
+
+        Se a página parou por atingir `size` downloads (ou pela parada do job),
+        a próxima recomeça na última página de resultados tratada (as URLs já
+        vistas são puladas sem download); senão todos os resultados pedidos
+        foram percorridos.
+        """
+        self.downloaded += downloaded
+        if stopped:
+            self.offset = max(offset, last_page_offset if last_page_offset is not None else offset)
+        elif downloaded >= size and last_page_offset is not None:
+            self.offset = max(last_page_offset, offset + BING_PAGE_STEP)
+        else:
+            self.offset = offset + math.ceil(size / BING_PAGE_STEP) * BING_PAGE_STEP
+
+    def is_caught_up(self):
+        """True quando todo arquivo baixado até agora já foi validado."""
+        return self.processed >= self.downloaded
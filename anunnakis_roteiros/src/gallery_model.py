@@ -0,0 +1,169 @@
+"""Modelo Qt da galeria de imagens salvas.
+
+As imagens vêm do BD em páginas (como a biblioteca de roteiros). A miniatura de
+um item só é pedida quando a view precisa desenhá-lo: se não estiver no cache
+em disco, é gerada num pool de threads e o item é atualizado quando fica pronta.
+"""
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, Signal
+from PySide6.QtGui import QPixmap, QIcon
+from PySide6.QtWidgets import QApplication, QStyle
+
+from .thumbnails import ThumbnailCache, index_saved_images
+
+# Miniaturas mantidas em memória (as demais são relidas do cache em disco)
+MAX_ICONS_IN_MEMORY = 1000
+
+
+class _ThumbnailSignals(QObject):
+    # geração, hash, caminho da miniatura ("" se falhou)
+    ready = Signal(int, str, str)
+
+
+class GalleryModel(QAbstractListModel):
+    def __init__(self, db_manager, thumbnail_dir, image_dir, page_size=200, workers=None, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.thumbnails = ThumbnailCache(thumbnail_dir)
+        self.image_dir = image_dir
+        self.page_size = page_size
+        self.term = None
+        self._rows = []
+        self._row_of = {}
+        self._exhausted = True
+        self._saved_index = None
+        # Cada troca de termo incrementa a geração; resultados antigos são ignorados
+        self._generation = 0
+        self._pending = set()
+        # Miniaturas que falharam (arquivo sumido ou inválido): mostram o ícone
+        # genérico em vez de voltar ao pool a cada repintura
+        self._failed = set()
+        self._placeholder = None
+        self._icons = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="miniaturas")
+        self._signals = _ThumbnailSignals()
+        self._signals.ready.connect(self._on_thumbnail_ready)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        image = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(image["file_path"]) if image["file_path"] else image["hash"][:8]
+        if role == Qt.DecorationRole:
+            return self._icon_for(image)
+        if role == Qt.ToolTipRole:
+            return f"{image['term']}\n{image['file_path'] or 'arquivo não encontrado'}\n{image['downloaded_at']}"
+        if role == Qt.UserRole:
+            return image["file_path"]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        before = None
+        if self._rows:
+            before = (self._rows[-1]["downloaded_at"], self._rows[-1]["hash"])
+        page = self.db_manager.list_images(self.term, self.page_size, before=before)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        self._resolve_missing_paths(page)
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        for offset, image in enumerate(page):
+            self._row_of[image["hash"]] = start + offset
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def set_term(self, term):
+        """Mostra as imagens de um termo (None = todas)."""
+        self.term = term
+        self._generation += 1
+        self._pending.clear()
+        self._failed.clear()
+        self.beginResetModel()
+        self._rows = []
+        self._row_of = {}
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_image_dir(self, image_dir):
+        self.image_dir = image_dir
+        self._saved_index = None
+
+    def shutdown(self):
+        self._generation += 1
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _resolve_missing_paths(self, page):
+        """Acha pelo nome do arquivo as imagens salvas antes da coluna file_path e grava no BD."""
+        missing = [image for image in page if not image["file_path"]]
+        if not missing:
+            return
+        if self._saved_index is None:
+            self._saved_index = index_saved_images(self.image_dir)
+        found = []
+        for image in missing:
+            path = self._saved_index.get(image["hash"][:8])
+            if path:
+                image["file_path"] = os.path.abspath(path)
+                found.append((image["hash"], image["file_path"]))
+        if found:
+            self.db_manager.set_image_file_paths(found)
+
+    def _icon_for(self, image):
+        digest = image["hash"]
+        icon = self._icons.get(digest)
+        if icon is not None:
+            self._icons.move_to_end(digest)
+            return icon
+        if not image["file_path"] or digest in self._failed:
+            return self._placeholder_icon()
+        if digest not in self._pending:
+            self._pending.add(digest)
+            self._pool.submit(self._build_thumbnail, self._generation, digest, image["file_path"])
+        return None
+
+    def _placeholder_icon(self):
+        if self._placeholder is None:
+            self._placeholder = QApplication.style().standardIcon(QStyle.SP_FileIcon)
+        return self._placeholder
+
+    def _build_thumbnail(self, generation, digest, file_path):
+        # Roda no pool; miniaturas já em disco saem sem abrir a imagem original
+        if generation != self._generation:
+            return
+        try:
+            path = self.thumbnails.get_or_create(file_path, digest)
+        except Exception as e:
+            print(f"Aviso: miniatura de {file_path}: {e}")
+            path = ""
+        self._signals.ready.emit(generation, digest, path)
+
+    def _on_thumbnail_ready(self, generation, digest, path):
+        if generation != self._generation:
+            return
+        self._pending.discard(digest)
+        if not path:
+            self._failed.add(digest)
+        else:
+            self._icons[digest] = QIcon(QPixmap(path))
+            if len(self._icons) > MAX_ICONS_IN_MEMORY:
+                self._icons.popitem(last=False)
+        row = self._row_of.get(digest)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
@@ -1,30 +1,222 @@
 import os
-from google import genai
-import re
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+
+from .roteiro_parser import render_roteiro
+from .model_health import ModelHealth, classify_error, FAILURE_NOT_FOUND, FAILURE_OVERLOAD
+
+# Validade padrão do cache de modelos (segundos); pode ser alterada por GEMINI_MODEL_CACHE_TTL
+DEFAULT_MODEL_CACHE_TTL = 24 * 60 * 60
+
+# Limites padrão do cache de respostas (ver enable_response_cache)
+RESPONSE_CACHE_MAX_ENTRIES = 500
+RESPONSE_CACHE_MAX_BYTES = 20 * 1024 * 1024
+RESPONSE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+SYSTEM_INSTRUCTION = (
+    "Você é um roteirista especializado em mitologia suméria e na teoria dos Antigos Astronautas, "
+    "com foco nos Anunnakis. Sua tarefa é criar um roteiro de história detalhado e envolvente "
+    "baseado no prompt do usuário. O roteiro deve ser estruturado em cenas e parágrafos. "
+    "Inclua sugestões de tempo de leitura/duração para cada cena (ex: [Duração: 2 minutos]). "
+    "O roteiro deve ser totalmente controlável pelo usuário, então use títulos de cena claros e "
+    "parágrafos bem definidos. O tema principal é sempre relacionado aos Anunnakis."
+)
+
+# Hedging: segundo pedido ao próximo modelo se o primeiro passar deste percentil de latência
+HEDGE_PERCENTILE = 95
+HEDGE_MAX_PER_MINUTE = 10
+HEDGE_DEFAULT_DELAY = 15.0  # segundos, enquanto o modelo ainda não tem amostras de latência
+# Pedidos simultâneos por geração com hedging: o principal e um extra
+HEDGE_FANOUT = 2
+
+# Prompts sugeridos (botão de sugestão aleatória e geração em lote)
+SUGGESTED_PROMPTS = [
+    "Gere um roteiro detalhado sobre a mitologia Anunnaki e sua presença na história humana",
+    "Crie um roteiro educativo explicando quem são os Anunnaki de acordo com textos sumérios",
+    "Desenvolva um roteiro explorando a teoria de que os Anunnaki visitaram a Terra",
+    "Elabore um roteiro sobre os textos históricos e como descrevem os Anunnaki",
+    "Gere um roteiro cobrindo as teorias sobre os Anunnaki e antigas civilizações",
+    "Crie um roteiro comparando mitologias Anunnaki com outras civilizações",
+    "Desenvolva um roteiro sobre símbolos Anunnaki encontrados em artefatos antigos",
+    "Gere um roteiro explicando a genealogia dos Anunnaki",
+    "Elabore um roteiro sobre tecnologia antiga e os Anunnaki",
+    "Crie um roteiro explorando o papel dos Anunnaki em diferentes religiões"
+]
+
+# Parâmetros extras do GenerateContentConfig (temperatura etc.); entram na chave do cache
+GENERATION_CONFIG = {}
+
+
+def api_key_fingerprint(api_key):
+    """Identifica a chave da API no cache de modelos sem gravar a chave."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+def response_cache_key(model, system_instruction, contents, config):
+    """Chave do cache de respostas: SHA-256 de (modelo, instrução, prompt, config)."""
+    payload = json.dumps([model, system_instruction, contents, config],
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 class GeminiGenerator:
-    def __init__(self):
-        """Inicializa o cliente Gemini com a chave da API do arquivo .env"""
+    def __init__(self, lazy=False, cache_dir=None, model_cache_ttl=None):
+        """Inicializa o cliente Gemini com a chave da API do arquivo .env
+
+        Com lazy=True nada é feito aqui (nem o import do google-genai, nem a
+        listagem de modelos pela rede): chame initialize() em segundo plano, ou
+        deixe que generate() inicialize no primeiro uso.
+
+        O modelo escolhido e a lista de modelos disponíveis ficam em cache no
+        disco por `model_cache_ttl` segundos (por chave da API), evitando listar
+        modelos a cada abertura. A lista filtra a cadeia de fallback.
+        """
+        self.client = None
+        self.model = None
+        # Modelos disponíveis para a chave atual (None = desconhecidos)
+        self.available_models = None
+        self._api_key_hash = None
+        self.initialized = False
+        self._init_lock = threading.Lock()
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(__file__), "db")
+        self.model_cache_file = os.path.join(cache_dir, "gemini_models_cache.json")
+        if model_cache_ttl is None:
+            model_cache_ttl = float(os.getenv('GEMINI_MODEL_CACHE_TTL', DEFAULT_MODEL_CACHE_TTL))
+        self.model_cache_ttl = model_cache_ttl
+
+        # Cache de respostas (opcional, ver enable_response_cache)
+        self.response_cache = None
+        # Saúde dos modelos da cadeia de fallback (pula modelos em cooldown)
+        self.health = ModelHealth()
+        # Hedging (opcional, ver enable_hedging)
+        self.hedging = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_times = deque()
+        # Estado por thread (a geração em lote chama generate() de várias threads)
+        self._local = threading.local()
+
+        if not lazy:
+            self.initialize()
+
+    @property
+    def last_from_cache(self):
+        """Se a última geração desta thread veio do cache de respostas."""
+        return getattr(self._local, "from_cache", False)
+
+    @last_from_cache.setter
+    def last_from_cache(self, value):
+        self._local.from_cache = value
+
+    def initialize(self):
+        """Cria o cliente e escolhe o modelo (uma única vez; seguro entre threads)."""
+        with self._init_lock:
+            if self.initialized:
+                return
+            try:
+                # Carrega a chave da API da variável de ambiente
+                api_key = os.getenv('GEMINI_API_KEY')
+                
+                if not api_key:
+                    raise ValueError(
+                        "GEMINI_API_KEY não configurada. "
+                        "Crie um arquivo .env na raiz do projeto com sua chave API."
+                    )
+
+                # Import pesado: só acontece quando o cliente é realmente necessário
+                from google import genai
+
+                self.client = genai.Client(api_key=api_key)
+                self._api_key_hash = api_key_fingerprint(api_key)
+                self.model = self._select_best_model()
+                print(f"Modelo Gemini selecionado: {self.model}")
+            except Exception as e:
+                print(f"Erro ao inicializar o cliente Gemini: {e}")
+                self.client = None
+                self.model = None
+            finally:
+                self.initialized = True
+
+    def enable_response_cache(self, db_manager, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                              max_bytes=RESPONSE_CACHE_MAX_BYTES, max_age_seconds=RESPONSE_CACHE_MAX_AGE):
+        """Ativa o cache de respostas no BD do db_manager (None desativa).
+
+        Prompts repetidos com o mesmo modelo, instrução e config voltam do
+        SQLite sem chamar a API. As entradas expiram por idade e as menos
+        usadas saem quando o cache passa de max_entries ou max_bytes.
+        """
+        self.response_cache = db_manager
+        self.response_cache_limits = {
+            "max_entries": max_entries,
+            "max_bytes": max_bytes,
+            "max_age_seconds": max_age_seconds
+        }
+
+    def _get_cached_response(self, models, full_prompt):
+        max_age = self.response_cache_limits["max_age_seconds"]
+        for model in dict.fromkeys(models):
+            key = response_cache_key(model, SYSTEM_INSTRUCTION, full_prompt, GENERATION_CONFIG)
+            text = self.response_cache.get_cached_response(key, max_age_seconds=max_age)
+            if text is not None:
+                print(f"Resposta do cache (modelo {model})")
+                return text
+        return None
+
+    def _store_cached_response(self, model, full_prompt, text):
         try:
-            # Carrega a chave da API da variável de ambiente
-            api_key = os.getenv('GEMINI_API_KEY')
-            
-            if not api_key:
-                raise ValueError(
-                    "GEMINI_API_KEY não configurada. "
-                    "Crie um arquivo .env na raiz do projeto com sua chave API."
-                )
-            
-            self.client = genai.Client(api_key=api_key)
-            self.model = self._select_best_model()
-            print(f"Modelo Gemini selecionado: {self.model}")
+            key = response_cache_key(model, SYSTEM_INSTRUCTION, full_prompt, GENERATION_CONFIG)
+            self.response_cache.save_cached_response(key, model, full_prompt, text)
+            self.response_cache.prune_response_cache(**self.response_cache_limits)
         except Exception as e:
-            print(f"Erro ao inicializar o cliente Gemini: {e}")
-            self.client = None
-            self.model = None
+            print(f"Aviso ao salvar no cache de respostas: {e}")
+
+    def _load_model_cache(self):
+        """Retorna o cache de modelos se for da chave atual e estiver dentro da validade, senão None."""
+        try:
+            with open(self.model_cache_file, encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("key_hash") != self._api_key_hash:
+                # Outra chave da API (ou cache antigo, sem chave): lista de novo
+                return None
+            if time.time() - cache["saved_at"] <= self.model_cache_ttl and cache.get("model"):
+                return cache
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _save_model_cache(self, model, available_model_names):
+        try:
+            os.makedirs(os.path.dirname(self.model_cache_file), exist_ok=True)
+            with open(self.model_cache_file, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model": model,
+                    "available": available_model_names,
+                    "key_hash": self._api_key_hash,
+                    "saved_at": time.time()
+                }, f)
+        except OSError as e:
+            print(f"Aviso ao salvar cache de modelos: {e}")
+
+    def invalidate_model_cache(self):
+        """Apaga o cache de modelos (a próxima inicialização volta a listar pela API)."""
+        try:
+            os.remove(self.model_cache_file)
+        except FileNotFoundError:
+            pass
 
     def _select_best_model(self):
         """Detecta os modelos disponíveis e seleciona o melhor para geração de texto."""
+        # Usa o modelo do cache em disco, se ainda válido (nenhuma chamada à API)
+        cached = self._load_model_cache()
+        if cached:
+            print(f"Modelo Gemini do cache: {cached['model']}")
+            if cached.get("available"):
+                self.available_models = set(cached["available"])
+            return cached["model"]
+
         # Lista de modelos em ordem de preferência
         preferred_models = [
             'gemini-2.0-flash',           # Últimas e melhores capacidades
@@ -44,134 +236,318 @@ class GeminiGenerator:
             available_model_names = [model.name.split('/')[-1] for model in available_models]
             
             print(f"Modelos disponíveis: {available_model_names[:5]}...")  # Mostra primeiros 5
+            if available_model_names:
+                self.available_models = set(available_model_names)
             
             # Tenta encontrar o melhor modelo na lista de preferências
+            selected = None
             for preferred_model in preferred_models:
                 if preferred_model in available_model_names:
-                    return preferred_model
+                    selected = preferred_model
+                    break
             
             # Se nenhum modelo preferido foi encontrado, usa o primeiro disponível
-            if available_model_names:
-                return available_model_names[0]
+            if selected is None and available_model_names:
+                selected = available_model_names[0]
             
-            # Fallback padrão
-            return 'gemini-2.0-flash'
+            if selected is None:
+                # Fallback padrão (não vai para o cache)
+                return 'gemini-2.0-flash'
+
+            self._save_model_cache(selected, available_model_names)
+            return selected
             
         except Exception as e:
             print(f"Aviso ao listar modelos: {e}. Usando modelo padrão 'gemini-2.0-flash'")
             return 'gemini-2.0-flash'
 
-    def generate(self, prompt):
-        """Gera um roteiro de história sobre Anunnakis usando a API Gemini."""
-        if not self.client:
-            raise Exception("Cliente Gemini não inicializado. Verifique a configuração da sua chave API.")
-
-        system_instruction = (
-            "Você é um roteirista especializado em mitologia suméria e na teoria dos Antigos Astronautas, "
-            "com foco nos Anunnakis. Sua tarefa é criar um roteiro de história detalhado e envolvente "
-            "baseado no prompt do usuário. O roteiro deve ser estruturado em cenas e parágrafos. "
-            "Inclua sugestões de tempo de leitura/duração para cada cena (ex: [Duração: 2 minutos]). "
-            "O roteiro deve ser totalmente controlável pelo usuário, então use títulos de cena claros e "
-            "parágrafos bem definidos. O tema principal é sempre relacionado aos Anunnakis."
-        )
-        
-        full_prompt = f"Crie um roteiro de história sobre Anunnakis com o seguinte tema: '{prompt}'"
+    def _fallback_models(self):
+        """Lista de modelos em ordem de preferência (fallback)
 
-        # Lista de modelos em ordem de preferência (fallback)
-        fallback_models = [
-            self.model,
+        Modelos fora da lista de disponíveis da chave (quando conhecida) ficam
+        de fora, em vez de custar uma chamada "não encontrado" cada.
+        """
+        fallback = [
             'gemini-2.0-flash',
             'gemini-2.0-flash-lite',
             'gemini-1.5-pro',
             'gemini-1.5-flash',
             'gemini-1.5-flash-8b',
         ]
-        
+        if self.available_models:
+            fallback = [model for model in fallback if model in self.available_models]
+        return [self.model] + fallback
+
+    def _record_failure(self, model, error):
+        """Registra a falha na saúde do modelo (pode colocá-lo em cooldown)."""
+        kind = classify_error(error)
+        cooldown = self.health.record_failure(model, kind, error)
+        if kind == FAILURE_NOT_FOUND:
+            print(f"Modelo {model} não disponível, tentando próximo...")
+            if model == self.model and 'not found' in str(error).lower():
+                # O modelo do cache deixou de existir: força nova listagem na próxima abertura
+                self.invalidate_model_cache()
+        elif kind == FAILURE_OVERLOAD:
+            print(f"Modelo {model} sobrecarregado, tentando próximo...")
+        else:
+            print(f"Erro com {model}: {error}. Tentando próximo...")
+        if cooldown:
+            print(f"Modelo {model} em espera por {cooldown:.0f} s")
+
+    def get_model_health(self):
+        """Latência média, taxa de erro e cooldown de cada modelo já usado."""
+        return self.health.stats()
+
+    def generate(self, prompt, force=False):
+        """Gera um roteiro de história sobre Anunnakis usando a API Gemini.
+
+        Com o cache de respostas ativo, um prompt repetido volta do BD sem
+        chamar a API; force=True ignora o cache e gera de novo.
+        """
+        self.last_from_cache = False
+        self.initialize()
+        if not self.client:
+            raise Exception("Cliente Gemini não inicializado. Verifique a configuração da sua chave API.")
+
+        full_prompt = f"Crie um roteiro de história sobre Anunnakis com o seguinte tema: '{prompt}'"
+        fallback_models = self._fallback_models()
+
+        if self.response_cache is not None and not force:
+            cached = self._get_cached_response(fallback_models, full_prompt)
+            if cached is not None:
+                self.last_from_cache = True
+                return cached
+
+        order = self.health.order(fallback_models)
         last_error = None
-        
+
+        if self.hedging is not None and len(order) > 1:
+            model, text, tried, last_error = self._generate_hedged(order, full_prompt)
+            if text is not None:
+                if self.response_cache is not None and text:
+                    self._store_cached_response(model, full_prompt, text)
+                return text
+            order = [m for m in order if m not in tried]
+
         # Tenta usar cada modelo até conseguir uma resposta bem-sucedida
-        for model in fallback_models:
+        for model in order:
+            try:
+                text = self._call_model(model, full_prompt)
+            except Exception as e:
+                last_error = e
+                continue
+            if self.response_cache is not None and text:
+                self._store_cached_response(model, full_prompt, text)
+            return text
+        
+        # Se todos os modelos falharam, lança a última exceção
+        raise Exception(f"Erro na geração do roteiro com todos os modelos: {last_error}")
+
+    def _call_model(self, model, full_prompt):
+        """Uma chamada a generate_content, registrando a saúde do modelo (propaga o erro)."""
+        from google import genai
+
+        start = time.perf_counter()
+        try:
+            print(f"Tentando com modelo: {model}")
+            response = self.client.models.generate_content(
+                model=model,
+                contents=full_prompt,
+                config=genai.types.GenerateContentConfig(
+                    system_instruction=SYSTEM_INSTRUCTION,
+                    **GENERATION_CONFIG
+                )
+            )
+        except Exception as e:
+            self._record_failure(model, e)
+            raise
+        self.health.record_success(model, time.perf_counter() - start)
+        print(f"Sucesso com modelo: {model}")
+        return response.text
+
+    def enable_hedging(self, percentile=HEDGE_PERCENTILE, max_per_minute=HEDGE_MAX_PER_MINUTE,
+                       default_delay=HEDGE_DEFAULT_DELAY):
+        """Ativa o hedging no generate() (percentile=None desativa).
+
+        Se o modelo principal não responder dentro do percentil indicado da sua
+        latência observada, um segundo pedido vai para o próximo modelo da
+        cadeia e vale a primeira resposta. No máximo max_per_minute pedidos
+        extras por minuto.
+        """
+        if percentile is None:
+            self.hedging = None
+            return
+        self.hedging = {
+            "percentile": percentile,
+            "max_per_minute": max_per_minute,
+            "default_delay": default_delay
+        }
+
+    def _take_hedge_budget(self):
+        now = time.monotonic()
+        with self._hedge_lock:
+            while self._hedge_times and now - self._hedge_times[0] > 60:
+                self._hedge_times.popleft()
+            if len(self._hedge_times) >= self.hedging["max_per_minute"]:
+                return False
+            self._hedge_times.append(now)
+            return True
+
+    def _generate_hedged(self, order, full_prompt):
+        """Corrida entre o modelo principal e, se ele demorar, o seguinte.
+
+        Retorna (modelo, texto, modelos_tentados, último_erro); texto é None se
+        todos os tentados falharam. O pedido perdedor não pode ser interrompido
+        no meio da chamada HTTP: ele termina em segundo plano e é descartado.
+        Cada chamada usa um executor próprio com HEDGE_FANOUT threads, encerrado
+        ao retornar (a thread do perdedor sai assim que a chamada dele acaba).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=HEDGE_FANOUT, thread_name_prefix="gemini-hedge")
+        try:
+            return self._race_models(pool, order, full_prompt)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _race_models(self, pool, order, full_prompt):
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        primary, backup = order[0], order[1]
+        delay = self.health.latency_percentile(primary, self.hedging["percentile"])
+        if delay is None:
+            delay = self.hedging["default_delay"]
+
+        pending = {pool.submit(self._call_model, primary, full_prompt): primary}
+        tried = [primary]
+        done, _ = wait(pending, timeout=delay)
+        if not done and self._take_hedge_budget():
+            print(f"Modelo {primary} passou de {delay:.1f} s; enviando pedido extra para {backup}")
+            pending[pool.submit(self._call_model, backup, full_prompt)] = backup
+            tried.append(backup)
+
+        last_error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for other in pending:
+                    other.cancel()
+                return model, text, tried, None
+        return None, None, tried, last_error
+
+    def generate_stream(self, prompt, on_chunk, force=False):
+        """Como generate(), mas usa a API de streaming e chama on_chunk(texto) a cada trecho.
+
+        Retorna o texto completo. Só troca de modelo se a falha acontecer antes
+        do primeiro trecho; depois disso o erro é propagado (o texto parcial já
+        foi entregue). Respostas do cache chegam num único trecho.
+        """
+        self.last_from_cache = False
+        self.initialize()
+        if not self.client:
+            raise Exception("Cliente Gemini não inicializado. Verifique a configuração da sua chave API.")
+
+        full_prompt = f"Crie um roteiro de história sobre Anunnakis com o seguinte tema: '{prompt}'"
+        fallback_models = self._fallback_models()
+
+        if self.response_cache is not None and not force:
+            cached = self._get_cached_response(fallback_models, full_prompt)
+            if cached is not None:
+                self.last_from_cache = True
+                on_chunk(cached)
+                return cached
+
+        from google import genai
+
+        last_error = None
+        for model in self.health.order(fallback_models):
+            parts = []
+            start = time.perf_counter()
             try:
-                print(f"Tentando com modelo: {model}")
-                response = self.client.models.generate_content(
+                print(f"Tentando (streaming) com modelo: {model}")
+                stream = self.client.models.generate_content_stream(
                     model=model,
                     contents=full_prompt,
                     config=genai.types.GenerateContentConfig(
-                        system_instruction=system_instruction
+                        system_instruction=SYSTEM_INSTRUCTION,
+                        **GENERATION_CONFIG
                     )
                 )
-                print(f"Sucesso com modelo: {model}")
-                return response.text
-                
+                for chunk in stream:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        on_chunk(text)
             except Exception as e:
+                if parts:
+                    raise Exception(f"Streaming interrompido com {model}: {e}")
                 last_error = e
-                error_msg = str(e).lower()
-                
-                # Se for erro de modelo não encontrado, tenta o próximo
-                if 'not found' in error_msg or 'invalid' in error_msg or 'not available' in error_msg:
-                    print(f"Modelo {model} não disponível, tentando próximo...")
-                    continue
-                
-                # Se for erro de sobrecarga, também tenta o próximo
-                if 'overload' in error_msg or 'unavailable' in error_msg or 'busy' in error_msg:
-                    print(f"Modelo {model} sobrecarregado, tentando próximo...")
-                    continue
-                
-                # Para outros erros, continua tentando
-                print(f"Erro com {model}: {e}. Tentando próximo...")
+                self._record_failure(model, e)
                 continue
-        
-        # Se todos os modelos falharam, lança a última exceção
+
+            self.health.record_success(model, time.perf_counter() - start)
+            print(f"Sucesso com modelo: {model}")
+            full_text = ''.join(parts)
+            if self.response_cache is not None and full_text:
+                self._store_cached_response(model, full_prompt, full_text)
+            return full_text
+
         raise Exception(f"Erro na geração do roteiro com todos os modelos: {last_error}")
 
-    def format_roteiro(self, roteiro_raw, mode):
-        """Formata o roteiro bruto de acordo com o modo de visualização selecionado."""
-        
-        if mode == "Padrão (com marcações)":
-            # Retorna o texto como veio, com todas as marcações (títulos, durações, etc.)
-            return roteiro_raw
-            
-        elif mode == "Limpo (apenas parágrafos)":
-            # Remove títulos de cena e marcações de duração
-            # Assume que títulos de cena são linhas em MAIÚSCULAS ou com formatação específica (ex: #, ##)
-            # e que marcações de duração estão entre colchetes.
-            lines = roteiro_raw.split('\n')
-            clean_lines = []
-            for line in lines:
-                # Remove marcações de duração (ex: [Duração: 2 minutos])
-                line = re.sub(r'\[Duração:.*?\]', '', line).strip()
-                
-                # Tenta identificar e remover títulos (linhas curtas e em maiúsculas)
-                if line and len(line) < 80 and line.isupper() and not line.endswith('.'):
+    def generate_batch(self, prompts, max_concurrency=3, on_result=None, force=False, stop_event=None):
+        """Gera vários roteiros em paralelo, com no máximo max_concurrency chamadas simultâneas.
+
+        on_result(prompt, resultado, segundos) é chamado na thread de quem
+        chamou, assim que cada roteiro fica pronto (resultado é o texto ou a
+        Exception). Prompts ainda não iniciados são pulados se stop_event for
+        acionado. Retorna um resumo com os totais e a vazão em roteiros/minuto.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        self.initialize()
+        start = time.perf_counter()
+        summary = {"total": len(prompts), "ok": 0, "failed": 0, "skipped": 0}
+
+        def run(prompt):
+            if stop_event is not None and stop_event.is_set():
+                return prompt, None, 0.0
+            t0 = time.perf_counter()
+            try:
+                result = self.generate(prompt, force=force)
+            except Exception as e:
+                result = e
+            return prompt, result, time.perf_counter() - t0
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency),
+                                thread_name_prefix="gemini-lote") as pool:
+            futures = [pool.submit(run, prompt) for prompt in prompts]
+            for future in as_completed(futures):
+                prompt, result, seconds = future.result()
+                if result is None:
+                    summary["skipped"] += 1
                     continue
-                
-                if line:
-                    clean_lines.append(line)
-            
-            return '\n\n'.join(clean_lines)
-            
-        elif mode == "Com Tempos (para leitura)":
-            # Destaca apenas os parágrafos e os tempos de leitura
-            lines = roteiro_raw.split('\n')
-            formatted_lines = []
-            for line in lines:
-                line = line.strip()
-                
-                # Encontra a marcação de duração
-                duration_match = re.search(r'(\[Duração:.*?\])', line)
-                
-                if duration_match:
-                    # Se for uma linha de título com duração, destaca a duração
-                    duration = duration_match.group(1)
-                    line_without_duration = line.replace(duration, '').strip()
-                    formatted_lines.append(f"--- {line_without_duration} --- {duration}\n")
-                elif line:
-                    # Se for um parágrafo, apenas adiciona
-                    formatted_lines.append(line)
-            
-            return '\n'.join(formatted_lines)
-            
-        return roteiro_raw
+                summary["failed" if isinstance(result, Exception) else "ok"] += 1
+                if on_result is not None:
+                    on_result(prompt, result, seconds)
+
+        elapsed = time.perf_counter() - start
+        summary["elapsed_seconds"] = elapsed
+        summary["per_minute"] = summary["ok"] * 60 / elapsed if elapsed > 0 else 0.0
+        return summary
+
+    def format_roteiro(self, roteiro_raw, mode):
+        """Formata o roteiro bruto de acordo com o modo de visualização selecionado.
+
+        O texto é analisado uma única vez (ver roteiro_parser) e a análise fica
+        em cache, então trocar de modo não reprocessa o roteiro.
+        """
+        return render_roteiro(roteiro_raw, mode)
 
 if __name__ == '__main__':
     # Este bloco é apenas para teste e não será executado na aplicação GUI
@@ -0,0 +1,114 @@
+"""Sessão HTTP compartilhada pelos crawlers do scraper.
+
+O BingImageCrawler cria por padrão uma sessão por crawler, com 1 thread de
+download, pool de conexões padrão do requests e timeout fixo de 5 s. Aqui:
+
+* uma única sessão (keep-alive) é compartilhada por todos os jobs, com o pool
+  de conexões por host dimensionado pelo limite de requisições simultâneas;
+* semáforos limitam as requisições simultâneas por host e no total;
+* connect/read timeout configuráveis valem para páginas e imagens.
+
+Não depende de Qt; o requests só é importado ao criar a sessão.
+"""
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+DEFAULT_DOWNLOADER_THREADS = 4
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_GLOBAL_LIMIT = 16
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+
+
+class DownloadSettings:
+    """Parâmetros de download do scraper (threads por job, limites e timeouts)."""
+
+    def __init__(self, downloader_threads=DEFAULT_DOWNLOADER_THREADS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 global_limit=DEFAULT_GLOBAL_LIMIT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        self.downloader_threads = max(1, int(downloader_threads))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.global_limit = max(1, int(global_limit))
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+
+    def __repr__(self):
+        return (f"DownloadSettings(downloader_threads={self.downloader_threads}, "
+                f"per_host_limit={self.per_host_limit}, global_limit={self.global_limit}, "
+                f"connect_timeout={self.connect_timeout}, read_timeout={self.read_timeout})")
+
+
+class PooledSession:
+    """Sessão com pool de conexões, limites de concorrência e timeouts.
+
+    Usada no lugar da sessão do icrawler, que só chama get() (e headers).
+    """
+
+    def __init__(self, settings=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.settings = settings or DownloadSettings()
+        self.timeout = (self.settings.connect_timeout, self.settings.read_timeout)
+        self._session = requests.Session()
+        # Conexões keep-alive guardadas por host: uma por requisição simultânea permitida
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.settings.global_limit)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._global_slots = threading.BoundedSemaphore(self.settings.global_limit)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    @contextmanager
+    def _host_slot(self, url):
+        # Cada host guarda [semáforo, usuários]; usuários inclui quem ainda espera
+        # vaga, e a entrada sai do dicionário quando o último termina, para hosts
+        # vistos uma vez só não se acumularem durante a sessão
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            entry = self._host_slots.get(host)
+            if entry is None:
+                entry = self._host_slots[host] = [threading.BoundedSemaphore(self.settings.per_host_limit), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._host_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._host_slots[host]
+
+    @property
+    def headers(self):
+        return self._session.headers
+
+    def get(self, url, **kwargs):
+        # O icrawler passa o próprio timeout (5 s); o configurado tem precedência
+        kwargs["timeout"] = self.timeout
+        with self._host_slot(url), self._global_slots:
+            return self._session.get(url, **kwargs)
+
+    @contextmanager
+    def stream(self, url, **kwargs):
+        """GET com o corpo lido sob demanda; a vaga de concorrência fica ocupada até o fim do bloco."""
+        kwargs["timeout"] = self.timeout
+        with self._host_slot(url), self._global_slots:
+            response = self._session.get(url, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def close(self):
+        self._session.close()
+
+
+def attach_session(crawler, session):
+    """Troca a sessão de um crawler do icrawler (feeder, parser e downloader) pela compartilhada."""
+    session.headers.update(crawler.session.headers)
+    crawler.session.close()
+    crawler.session = session
+    for component in (crawler.feeder, crawler.parser, crawler.downloader):
+        component.session = session
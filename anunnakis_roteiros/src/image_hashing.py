@@ -0,0 +1,125 @@
+"""Hash perceptual (dHash) e índice de Hamming para detectar imagens quase duplicadas.
+
+O MD5 só detecta cópias byte a byte. A mesma imagem recomprimida, redimensionada
+ou com marca d'água em outro site gera um MD5 diferente, mas um dHash muito
+próximo (poucos bits de diferença). O HammingIndex permite consultar "existe
+algum hash a distância <= N?" sem comparar contra a biblioteca inteira.
+"""
+
+DHASH_SIZE = 8  # 8x8 comparações = hash de 64 bits
+
+
+def compute_dhash(img, hash_size=DHASH_SIZE):
+    """Calcula o dHash (difference hash) de uma imagem PIL.
+
+    Retorna o hash como string hexadecimal de 16 caracteres.
+    """
+    # Para JPEG, o draft pede ao decoder uma versão já reduzida (muito mais rápido)
+    try:
+        img.draft('L', (hash_size * 8, hash_size * 8))
+    except Exception:
+        pass
+
+    # PNG, WebP, GIF... chegam no tamanho original: RGB é reduzido (média por
+    # blocos) sem a cópia em tons de cinza do tamanho cheio; os demais modos
+    # (alfa, paleta...) só têm reduce via conversão, então convertem antes
+    factor = min(img.size) // (hash_size * 8)
+    if factor > 1:
+        if img.mode in ('L', 'RGB'):
+            img = img.reduce(factor)
+        else:
+            img = img.convert('L').reduce(factor)
+
+    small = img.convert('L').resize((hash_size + 1, hash_size))
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value <<= 1
+            if pixels[offset + col] > pixels[offset + col + 1]:
+                value |= 1
+
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def hamming_distance(a, b):
+    """Distância de Hamming entre dois hashes (int ou string hexadecimal)."""
+    if isinstance(a, str):
+        a = int(a, 16)
+    if isinstance(b, str):
+        b = int(b, 16)
+    return bin(a ^ b).count('1')
+
+
+class HammingIndex:
+    """Índice multi-tabela (multi-index hashing) sobre a distância de Hamming.
+
+    O hash de 64 bits é dividido em `chunks` blocos, e cada bloco tem sua própria
+    tabela bloco -> hashes. Pelo princípio da casa dos pombos, se dois hashes
+    diferem em até r bits, pelo menos um bloco difere em até r // chunks bits.
+    Assim a busca só olha os baldes dessas poucas variações de cada bloco em vez
+    de comparar contra a biblioteca inteira.
+    """
+
+    def __init__(self, bits=DHASH_SIZE * DHASH_SIZE, chunks=4):
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+        self._tables = [{} for _ in range(chunks)]
+        self._payloads = {}
+        self._flip_masks = {}
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def _split(self, value):
+        return [(value >> (i * self.chunk_bits)) & self._chunk_mask for i in range(self.chunks)]
+
+    def _masks_for_radius(self, radius):
+        """Máscaras com até `radius` bits ligados dentro de um bloco (em cache)."""
+        masks = self._flip_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            frontier = [(0, -1)]
+            for _ in range(radius):
+                next_frontier = []
+                for mask, last_bit in frontier:
+                    for bit in range(last_bit + 1, self.chunk_bits):
+                        new_mask = mask | (1 << bit)
+                        masks.append(new_mask)
+                        next_frontier.append((new_mask, bit))
+                frontier = next_frontier
+            self._flip_masks[radius] = masks
+        return masks
+
+    def add(self, phash, payload=None):
+        """Adiciona um hash (string hex ou int) ao índice."""
+        value = int(phash, 16) if isinstance(phash, str) else phash
+        if value in self._payloads:
+            return
+        self._payloads[value] = payload
+        for table, key in zip(self._tables, self._split(value)):
+            table.setdefault(key, []).append(value)
+
+    def find(self, phash, max_distance):
+        """Retorna o primeiro (payload, distância) a no máximo max_distance, ou None."""
+        value = int(phash, 16) if isinstance(phash, str) else phash
+
+        exact = self._payloads.get(value)
+        if exact is not None or value in self._payloads:
+            return exact, 0
+
+        masks = self._masks_for_radius(max_distance // self.chunks)
+        checked = set()
+        for table, key in zip(self._tables, self._split(value)):
+            for mask in masks:
+                for candidate in table.get(key ^ mask, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    distance = bin(value ^ candidate).count('1')
+                    if distance <= max_distance:
+                        return self._payloads[candidate], distance
+        return None
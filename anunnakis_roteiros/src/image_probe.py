@@ -0,0 +1,99 @@
+"""Leitura das dimensões de uma imagem a partir apenas do cabeçalho.
+
+Suporta JPEG, PNG, WebP, GIF e BMP. Lê só os bytes necessários (no JPEG, só os
+cabeçalhos dos segmentos até o SOF), sem decodificar pixels, para descartar
+candidatas pequenas ou inválidas antes de ler o arquivo inteiro.
+"""
+import struct
+
+# Marcadores SOF do JPEG que carregam as dimensões (exclui DHT, JPG e DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Marcadores sem campo de tamanho
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+# Limite de segmentos percorridos no JPEG (evita laços em arquivos corrompidos)
+_MAX_JPEG_SEGMENTS = 512
+
+
+def _probe_jpeg(f):
+    f.seek(2)
+    for _ in range(_MAX_JPEG_SEGMENTS):
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            return None
+        marker = f.read(1)
+        # Bytes 0xFF extras são preenchimento
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # Fim da imagem ou início dos dados sem ter achado o SOF
+            return None
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+
+        if marker in _JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return 'jpeg', width, height
+
+        f.seek(length - 2, 1)
+    return None
+
+
+def _probe_webp(header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and len(header) >= 30:
+        width, height = struct.unpack('<HH', header[26:30])
+        return 'webp', width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(header) >= 25 and header[20] == 0x2F:
+        bits = struct.unpack('<I', header[21:25])[0]
+        return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(header) >= 30:
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return 'webp', width, height
+    return None
+
+
+def probe_image(filepath):
+    """Retorna (formato, largura, altura) lendo só o cabeçalho, ou None se não reconhecer."""
+    with open(filepath, 'rb') as f:
+        header = f.read(32)
+
+        if header[:3] == b'\xff\xd8\xff':
+            return _probe_jpeg(f)
+
+        if header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', header[16:24])
+            return 'png', width, height
+
+        if header[:6] in (b'GIF87a', b'GIF89a'):
+            width, height = struct.unpack('<HH', header[6:10])
+            return 'gif', width, height
+
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return _probe_webp(header)
+
+        if header[:2] == b'BM' and len(header) >= 26:
+            dib_size = struct.unpack('<I', header[14:18])[0]
+            if dib_size == 12:
+                width, height = struct.unpack('<HH', header[18:22])
+            else:
+                width, height = struct.unpack('<ii', header[18:26])
+            return 'bmp', abs(width), abs(height)
+
+    return None
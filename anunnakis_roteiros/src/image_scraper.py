@@ -1,19 +1,186 @@
 import os
-import hashlib
-from PIL import Image
-from io import BytesIO
+import errno
 import time
 import shutil
-from icrawler.builtin import BingImageCrawler
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # Importar módulo local
-from .db_manager import DatabaseManager
+# (icrawler e PIL são importados só ao iniciar um scraping, para abrir o app mais rápido)
+from .callbacks import as_signal
+from .db_manager import (DatabaseManager, CANDIDATE_ACCEPTED, CANDIDATE_DOWNLOADED,
+                         CANDIDATE_FAILED, CANDIDATE_REJECTED)
+from .fetch_plan import FetchPlan, BING_MAX_OFFSET
+from .http_pool import DownloadSettings, PooledSession, attach_session
+from .image_hashing import HammingIndex
+from .scrape_log import ScrapeLogger, INFO
+from .source_urls import SourceUrlIndex, normalize_url, SOURCE_ACCEPTED, SOURCE_DUPLICATE, SOURCE_REJECTED
+
+# Tempo máximo (s) esperando a validação alcançar os downloads antes da próxima página
+CATCH_UP_TIMEOUT = 60
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _move_file(src, dst):
+    """Move `src` para `dst` sem reescrever o arquivo quando possível.
+
+    No mesmo sistema de arquivos é um os.replace (atômico, só renomeia). Entre
+    dispositivos, copia em blocos para um temporário ao lado do destino, que é
+    renomeado no fim (o destino nunca fica pela metade), e apaga a origem.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    partial_path = dst + ".part"
+    with open(src, 'rb') as fsrc, open(partial_path, 'wb') as fdst:
+        shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+    os.replace(partial_path, dst)
+    os.remove(src)
+
+
+class _ScrapeCheckpoint:
+    """Progresso persistido de um job: URLs já tratadas, arquivos temporários e vereditos.
+
+    As gravações ficam no buffer do DatabaseManager e vão para o BD no lote de
+    flush_hashes() (a cada página e no fim do job).
+
+    Sem job_id nada é gravado; as URLs tratadas ainda evitam baixar a mesma
+    imagem duas vezes na mesma execução.
+    """
+
+    def __init__(self, db_manager, job_id):
+        self.db_manager = db_manager
+        self.job_id = job_id
+        self.crawl_offset = 0
+        # Maior offset de página tratado nesta execução
+        self.last_page_offset = None
+        # URLs puladas por já estarem em source_urls e o tamanho que teriam
+        self.skipped_urls = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._seen_urls = set()
+        self._file_status = {}
+        self._file_urls = {}
+        if job_id is not None:
+            for url, file_name, status in db_manager.get_scrape_candidates(job_id):
+                self._seen_urls.add(url)
+                if file_name:
+                    self._file_status[file_name] = status
+                    self._file_urls[file_name] = url
+            job = db_manager.get_scrape_job(job_id)
+            self.crawl_offset = (job or {}).get("crawl_offset") or 0
+
+    @property
+    def resumed(self):
+        return bool(self._seen_urls)
+
+    def last_file_index(self):
+        """Maior número de arquivo temporário já usado pelo job (ver crawler.file_index)."""
+        from .crawler import file_index
+        with self._lock:
+            return max((file_index(name) for name in self._file_urls), default=0)
+
+    def is_finished_file(self, file_name):
+        """True se o arquivo temporário já recebeu veredito numa execução anterior."""
+        return self._file_status.get(file_name) in (CANDIDATE_ACCEPTED, CANDIDATE_REJECTED)
+
+    def url_for(self, filepath):
+        """URL de origem de um arquivo da pasta temporária (None se desconhecida)."""
+        with self._lock:
+            return self._file_urls.get(os.path.basename(filepath))
+
+    def claim_url(self, url):
+        """Reserva a URL para esta execução antes de baixar qualquer byte.
+
+        Retorna False se ela já foi tratada ou está sendo baixada por outra
+        thread (as páginas do Bing se sobrepõem e repetem resultados).
+        """
+        with self._lock:
+            if url in self._seen_urls:
+                return False
+            self._seen_urls.add(url)
+            return True
+
+    def add_skipped(self, size_bytes):
+        with self._lock:
+            self.skipped_urls += 1
+            self.bytes_saved += size_bytes
+
+    def on_task(self, task):
+        """Chamado pelo downloader para cada resultado tratado (threads do icrawler)."""
+        if task.get("skipped"):
+            return
+        if task.get("interrupted"):
+            # Download abandonado pela parada: a URL volta a poder ser baixada
+            with self._lock:
+                self._seen_urls.discard(task["file_url"])
+            return
+        with self._lock:
+            page_offset = task.get("page_offset")
+            if page_offset is not None and (self.last_page_offset is None or page_offset > self.last_page_offset):
+                self.last_page_offset = page_offset
+            if task.get("filename"):
+                self._file_urls[task["filename"]] = task["file_url"]
+        if self.job_id is None:
+            return
+        status = CANDIDATE_DOWNLOADED if task.get("success") and task.get("filename") else CANDIDATE_FAILED
+        self.db_manager.record_scrape_candidate(
+            self.job_id, task["file_url"], status, task.get("filename"), task.get("page_offset")
+        )
+
+    def set_verdict(self, filepath, accepted):
+        if self.job_id is None:
+            return
+        url = self.url_for(filepath)
+        if url is None:
+            return
+        self.db_manager.set_scrape_candidate_status(
+            self.job_id, url, CANDIDATE_ACCEPTED if accepted else CANDIDATE_REJECTED
+        )
+
+    def clear(self):
+        if self.job_id is not None:
+            self.db_manager.clear_scrape_candidates(self.job_id)
 
 
 class ImageScraper:
-    def __init__(self, db_manager: DatabaseManager, image_dir: str = None):
-        self.db_path = db_manager.db_file
+    def __init__(self, db_manager: DatabaseManager, image_dir: str = None, phash_threshold: int = 6,
+                 workers: int = None, pool_kind: str = "thread", log_level: int = INFO,
+                 download_settings: DownloadSettings = None):
+        # A conexao do DatabaseManager e segura entre threads, entao todos os jobs a reutilizam
+        self.db_manager = db_manager
         self.db_base_dir = db_manager.base_dir
+
+        # Pool para a etapa de validacao/hash ("thread" ou "process")
+        self.workers = workers or os.cpu_count() or 1
+        self.pool_kind = pool_kind
+
+        # Nível mínimo das mensagens enviadas ao log_signal (DEBUG mostra cada arquivo)
+        self.log_level = log_level
+
+        # Threads de download, limites de conexões e timeouts (ver http_pool);
+        # a sessão HTTP é compartilhada por todos os jobs e criada no primeiro uso
+        self.download_settings = download_settings or DownloadSettings()
+        self._http_session = None
+        self._http_lock = threading.Lock()
+        # Jobs usando cada sessão (uma sessão trocada só é fechada quando o último termina)
+        self._http_users = {}
+
+        # Distância de Hamming máxima (em bits, de 64) para considerar quase duplicada
+        self.phash_threshold = phash_threshold
+        # Índice de Hamming dos hashes perceptuais, carregado do BD no primeiro uso
+        self._phash_index = None
+        self._phash_index_version = None
+        self._phash_seq = 0
+        self._phash_lock = threading.Lock()
+        # Serializa a decisao final de duplicidade entre jobs simultaneos
+        self._accept_lock = threading.Lock()
+        # URLs de origem ja baixadas (puladas antes do download)
+        self.source_urls = SourceUrlIndex(db_manager)
         
         # Se nao especificar diretorio, usar G:\Meu Drive\CanaL Anunnaki
         if image_dir:
@@ -36,27 +203,238 @@ class ImageScraper:
         self.image_dir = path
         os.makedirs(self.image_dir, exist_ok=True)
 
-    def _calculate_hash(self, image_data):
-        """Calcula hash MD5 dos dados da imagem."""
-        return hashlib.md5(image_data).hexdigest()
+    def set_download_settings(self, settings: DownloadSettings):
+        """Troca os parâmetros de download; valem para os próximos jobs."""
+        with self._http_lock:
+            self.download_settings = settings
+            old_session, self._http_session = self._http_session, None
+            if old_session is None or old_session in self._http_users:
+                # Jobs em andamento continuam com a sessão antiga, fechada quando terminarem
+                return
+        old_session.close()
+
+    def _acquire_http_session(self):
+        with self._http_lock:
+            if self._http_session is None:
+                self._http_session = PooledSession(self.download_settings)
+            session = self._http_session
+            self._http_users[session] = self._http_users.get(session, 0) + 1
+            return session
+
+    def _release_http_session(self, session):
+        with self._http_lock:
+            self._http_users[session] -= 1
+            if self._http_users[session] > 0:
+                return
+            del self._http_users[session]
+            if session is self._http_session:
+                return
+        # Sessão trocada por set_download_settings enquanto o job rodava
+        session.close()
+
+    def _get_phash_index(self, db_manager):
+        """Retorna o índice de hashes perceptuais, construindo-o a partir do BD na primeira vez.
+
+        Quando outra conexão (outro processo) grava hashes no BD, só as linhas
+        novas (seq acima do último visto) são adicionadas.
+        """
+        version = db_manager.image_hashes_version()
+        with self._phash_lock:
+            if self._phash_index is None:
+                index = HammingIndex()
+                self._phash_seq = db_manager.image_hashes_seq()
+                for image_hash, phash in db_manager.iter_phashes():
+                    index.add(phash, image_hash)
+                self._phash_index = index
+                self._phash_index_version = version
+            elif self._phash_index_version != version:
+                rows, self._phash_seq = db_manager.phashes_since(self._phash_seq)
+                for image_hash, phash in rows:
+                    self._phash_index.add(phash, image_hash)
+                self._phash_index_version = version
+            return self._phash_index
 
-    def scrape_images(self, term, max_images, high_res, log_signal, progress_signal):
-        """Realiza web scraping usando icrawler BingImageCrawler."""
-        log_signal.emit(f"Iniciando busca por: '{term}' (Maximo: {max_images})")
+    def _find_near_duplicate(self, phash, db_manager):
+        """Retorna (hash, distância) da imagem parecida já baixada, ou None."""
+        index = self._get_phash_index(db_manager)
+        with self._phash_lock:
+            return index.find(phash, self.phash_threshold)
+
+    def _register_phash(self, phash, image_hash):
+        """Adiciona um hash perceptual recém-salvo ao índice em memória."""
+        with self._phash_lock:
+            if self._phash_index is not None:
+                self._phash_index.add(phash, image_hash)
+
+    def _create_pool(self):
+        """Cria o pool de workers da etapa de validacao/hash."""
+        if self.pool_kind == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="validacao")
+
+    def _accept_candidate(self, result, term, db_manager, known_hashes, log):
+        """Decide a duplicidade de uma candidata ja validada e salva no diretorio final.
+
+        Roda sempre na thread do job, de forma serial, para que duas candidatas
+        iguais processadas em paralelo nao sejam salvas duas vezes.
+        `known_hashes` e o conjunto de hashes do lote que ja existem no BD.
+        """
+        log.debug(f"  [DEBUG] Arquivo lido, tamanho: {result['size']} bytes")
+
+        if result['width']:
+            log.debug(f"  Dimensoes: {result['width']}x{result['height']} (maior: {max(result['width'], result['height'])}px)")
+
+        if not result['ok']:
+            log.debug(f"  Ignorado: {result['reason']}")
+            return False
+
+        file_hash = result['hash']
+        phash = result['phash']
+
+        # Verificar duplicidade (pre-checagem pelo lote consultado no BD)
+        if file_hash in known_hashes:
+            log.debug("  Ignorado: imagem JA BAIXADA (duplicada)")
+            return False
+
+        with self._accept_lock:
+            # Outro job simultaneo pode ter salvo a mesma imagem depois da consulta do lote
+            if db_manager.is_hash_downloaded(file_hash):
+                known_hashes.add(file_hash)
+                log.debug("  Ignorado: imagem JA BAIXADA (duplicada)")
+                return False
+
+            # Verificar quase duplicidade (recomprimida, redimensionada, marca d'agua...)
+            near_duplicate = self._find_near_duplicate(phash, db_manager)
+            if near_duplicate:
+                log.debug(f"  Ignorado: imagem QUASE DUPLICADA (distancia {near_duplicate[1]} de {near_duplicate[0][:8]})")
+                return False
+
+            # Mover para o diretorio final (sem copiar, se estiver no mesmo disco)
+            final_filename = f"{term.replace(' ', '_')}_{file_hash[:8]}_{int(time.time())}.{result['ext']}"
+            final_filepath = os.path.join(self.image_dir, final_filename)
+            _move_file(result['path'], final_filepath)
+
+            # Registrar no DB
+            db_manager.add_downloaded_hashes([(file_hash, term, phash, os.path.abspath(final_filepath))])
+            known_hashes.add(file_hash)
+            self._register_phash(phash, file_hash)
+        return True
+
+    def _record_verdict(self, checkpoint, result, term, saved):
+        """Grava o veredito no progresso do job e a URL de origem em source_urls."""
+        checkpoint.set_verdict(result['path'], saved)
+        if not saved:
+            # Rejeitada: libera o espaço na hora em vez de esperar o fim do job
+            try:
+                os.remove(result['path'])
+            except OSError:
+                pass
+        url = checkpoint.url_for(result['path'])
+        if url is None:
+            return
+        if saved:
+            status = SOURCE_ACCEPTED
+        elif result['ok']:
+            status = SOURCE_DUPLICATE
+        else:
+            status = SOURCE_REJECTED
+        self.source_urls.record(url, term, status, result['size'], max(result['width'], result['height']))
+
+    def _skip_known_url(self, url, checkpoint, min_dimension, log):
+        """Gancho do downloader: True para URLs ja tratadas, sem baixar nenhum byte."""
+        if not checkpoint.claim_url(url):
+            return True
+        size_bytes = self.source_urls.known_size(url, min_dimension)
+        if size_bytes is None:
+            return False
+        checkpoint.add_skipped(size_bytes)
+        log.debug(f"  Pulada: URL ja baixada antes ({url[:80]})")
+        return True
+
+    def _run_crawl(self, crawler, term, num_to_fetch, log, offset=0):
+        """Executa o crawl do icrawler (chamado numa thread separada)."""
+        try:
+            crawler.crawl(
+                keyword=term,
+                filters=None,
+                offset=offset,
+                max_num=num_to_fetch
+            )
+        except Exception as e:
+            log.warning(f"[AVISO] Erro no download: {str(e)[:50]}")
+
+    def _crawl_pages(self, crawler, term, plan, checkpoint, log):
+        """Pede ao Bing as paginas decididas pelo FetchPlan, uma apos a outra (thread separada)."""
+        downloader = crawler.downloader
+        while not downloader.is_stopped():
+            # O tamanho da proxima pagina depende do aproveitamento do que ja foi baixado
+            deadline = time.monotonic() + CATCH_UP_TIMEOUT
+            while not plan.is_caught_up() and not downloader.is_stopped() and time.monotonic() < deadline:
+                time.sleep(0.2)
+            page = plan.next_page()
+            if page is None or downloader.is_stopped():
+                break
+            offset, size = page
+            log.info(f"[BUSCA] Pagina a partir do offset {offset}: ate {size} downloads "
+                     f"(aproveitamento estimado {plan.accept_rate():.0%})")
+            self._run_crawl(crawler, term, size, log, offset)
+            plan.page_done(offset, size, downloader.fetched_num, checkpoint.last_page_offset,
+                           stopped=downloader.is_stopped())
+            self.db_manager.set_term_last_offset(term, plan.offset)
+            # Progresso da pagina (candidatas, vereditos, URLs de origem) num unico commit
+            self.db_manager.flush_hashes(persist_bloom=False)
+
+    def scrape_images(self, term, max_images, high_res, log_signal, progress_signal,
+                      job_id=None, on_saved=None, stop_event=None):
+        """Realiza web scraping usando icrawler BingImageCrawler.
+
+        O download e o processamento acontecem em paralelo: cada arquivo que o
+        icrawler termina de baixar entra numa fila e é validado/deduplicado/salvo
+        imediatamente. Quando `max_images` imagens únicas são salvas, o crawler
+        é interrompido.
+
+        Para jobs da fila: `job_id` separa a pasta temporaria de cada job,
+        `on_saved(n)` e chamado a cada imagem salva e `stop_event` (threading.Event)
+        interrompe o job. Retorna o numero de imagens salvas.
+        O progresso do job (URLs tratadas, arquivos baixados, vereditos e offset
+        da busca) fica no BD: ao rodar o mesmo job de novo, URLs e arquivos ja
+        tratados sao pulados e a busca continua da pagina em que parou.
+
+        `log_signal` e `progress_signal` podem ser sinais Qt, qualquer objeto
+        com `.emit` ou simples funcoes (uso sem interface grafica). Só chegam ao
+        `log_signal` mensagens a partir de `self.log_level`.
+        """
+        log = ScrapeLogger(log_signal, level=self.log_level)
+        progress_signal = as_signal(progress_signal)
+
+        from icrawler.builtin import BingImageCrawler
+        from .crawler import OffsetBingParser, StreamingImageDownloader, PARTIAL_SUFFIX, file_index
+        from .image_validation import validate_candidate
+
+        log.info(f"Iniciando busca por: '{term}' (Maximo: {max_images})")
         progress_signal.emit(10)
         
+        http_session = None
         try:
-            # Criar nova conexao com BD
-            db_manager = DatabaseManager(
-                os.path.basename(self.db_path),
-                base_dir=self.db_base_dir
-            )
+            db_manager = self.db_manager
+            checkpoint = _ScrapeCheckpoint(db_manager, job_id)
+            if checkpoint.resumed:
+                log.info(f"[INFO] Retomando job: busca a partir do offset {checkpoint.crawl_offset}")
+
+            # Comeca de onde as buscas anteriores do termo pararam
+            term_stats = db_manager.get_term_stats(term)
+            start_offset = max(checkpoint.crawl_offset, term_stats["last_offset"])
+            if start_offset >= BING_MAX_OFFSET:
+                log.info("[INFO] Resultados do termo ja percorridos ate o limite do Bing; recomecando do inicio")
+                start_offset = 0
+            plan = FetchPlan(max_images, start_offset, term_stats["accepted"], term_stats["total"])
             
             # Diretorio temporario para download
-            temp_dir = os.path.join(self.image_dir, "temp_bing")
+            temp_name = "temp_bing" if job_id is None else f"temp_bing_job_{job_id}"
+            temp_dir = os.path.join(self.image_dir, temp_name)
             os.makedirs(temp_dir, exist_ok=True)
             
-            log_signal.emit(f"[BUSCA] Buscando '{term}' no Bing Images...")
+            log.info(f"[BUSCA] Buscando '{term}' no Bing Images...")
             progress_signal.emit(20)
             
             # Usar BingImageCrawler do icrawler
@@ -68,231 +446,180 @@ class ImageScraper:
             else:
                 filters = {'size': 'medium', 'type': 'photo'}
 
-            try:
-                log_signal.emit(f"[INFO] Aplicando filtros de busca: {filters}")
-            except:
-                pass
+            log.info(f"[INFO] Aplicando filtros de busca: {filters}")
 
+            # Fila de arquivos prontos para processar, alimentada pelo downloader
+            candidates = queue.Queue()
+
+            # Arquivos que sobraram de uma execucao interrompida entram primeiro na fila
+            # (os que ja tinham veredito so sao apagados)
+            last_file_idx = checkpoint.last_file_index()
+            for leftover in sorted(os.listdir(temp_dir)):
+                leftover_path = os.path.join(temp_dir, leftover)
+                if not os.path.isfile(leftover_path):
+                    continue
+                last_file_idx = max(last_file_idx, file_index(leftover))
+                # Downloads incompletos e arquivos ja julgados sao so apagados
+                if leftover.endswith(PARTIAL_SUFFIX) or checkpoint.is_finished_file(leftover):
+                    try:
+                        os.remove(leftover_path)
+                    except OSError:
+                        pass
+                else:
+                    candidates.put((leftover_path, None))
+            if not candidates.empty():
+                log.info(f"[INFO] {candidates.qsize()} arquivos pendentes de execucao anterior")
+
+            http_session = self._acquire_http_session()
             bing_crawler = BingImageCrawler(
+                parser_cls=OffsetBingParser,
+                downloader_cls=StreamingImageDownloader,
+                downloader_threads=http_session.settings.downloader_threads,
                 storage={'root_dir': temp_dir}
             )
+            attach_session(bing_crawler, http_session)
+            # Continua a numeracao apos os arquivos ja usados pelo job (nomes nunca se repetem)
+            bing_crawler.downloader.set_file_index(last_file_idx)
+            # Itens da fila: (caminho, MD5 calculado no download ou None)
+            bing_crawler.downloader.on_file = lambda path, file_hash: candidates.put((path, file_hash))
+            min_dimension = 1080 if high_res else 480
+            bing_crawler.downloader.skip_url = (
+                lambda url: self._skip_known_url(url, checkpoint, min_dimension, log)
+            )
+            bing_crawler.downloader.on_task = checkpoint.on_task
             
-            log_signal.emit("[DOWNLOAD] Fazendo download das imagens...")
+            log.info("[DOWNLOAD] Fazendo download das imagens...")
             progress_signal.emit(30)
             
-            # Fazer download
-            try:
-                # Se houver muitas duplicatas, solicitar mais resultados ao icrawler
-                # Multiplicador padrão (10x) para aumentar a chance de conseguir
-                # max_images únicas. Capamos para evitar downloads excessivos.
-                multiplier = 10
-                if max_images <= 0:
-                    num_to_fetch = 100
-                else:
-                    num_to_fetch = max_images * multiplier
-                num_to_fetch = min(num_to_fetch, 1000)  # cap em 1000
-
-                log_signal.emit(f"[INFO] Solicitando até {num_to_fetch} resultados para compensar duplicatas...")
-                bing_crawler.crawl(
-                    keyword=term,
-                    filters=None,
-                    offset=0,
-                    max_num=num_to_fetch
-                )
-                # Aguardar conclusao do icrawler com timeout
-                log_signal.emit("[INFO] Aguardando conclusao do download...")
-                time.sleep(10)  # Aumentar tempo de espera significativamente
-            except Exception as e:
-                log_signal.emit(f"[AVISO] Erro no download: {str(e)[:50]}")
-            
-            progress_signal.emit(50)
-            
-            # Processar imagens baixadas
-            # O icrawler cria uma subpasta com o nome do termo e coloca as imagens lá dentro
-            search_folder = os.path.join(temp_dir, term)
-            
-            if not os.path.exists(search_folder):
-                try:
-                    log_signal.emit(f"[AVISO] Pasta esperada nao encontrada: {search_folder}")
-                except:
-                    pass
-                # Tentar usar temp_dir diretamente
-                search_folder = temp_dir
-                if not os.path.exists(search_folder):
-                    log_signal.emit("[ERRO] Pasta temporaria nao encontrada")
-                    progress_signal.emit(100)
-                    return
-            
+            # Resultados pedidos em paginas, dimensionadas pela taxa de aproveitamento do termo
+            # (ate max_images * 10 downloads, como antes)
+            if term_stats["total"]:
+                log.info(f"[INFO] Historico do termo: {term_stats['accepted']}/{term_stats['total']} "
+                         f"imagens aproveitadas; busca a partir do offset {start_offset}")
+            crawl_thread = threading.Thread(
+                target=self._crawl_pages,
+                args=(bing_crawler, term, plan, checkpoint, log),
+                daemon=True
+            )
+            crawl_thread.start()
+
             downloaded_count = 0
             processed_count = 0
-            
-            # Listar arquivos diretamente em temp_dir (icrawler nao cria subpastas)
-            image_files = []
+
+            # Validacao/hash em paralelo; dedupe e gravacao no BD ficam nesta thread
+            max_in_flight = self.workers * 2
+            pending = set()
+            pool = self._create_pool()
             try:
-                all_files = os.listdir(search_folder)
-                log_signal.emit(f"[DEBUG] Arquivos em temp_dir: {len(all_files)}")
-                log_signal.emit(f"[DEBUG] Listando arquivos: {all_files[:5]}...")  # DEBUG
-                for f in all_files:
-                    full_path = os.path.join(search_folder, f)
-                    # Verificar se arquivo existe e é imagem
-                    if os.path.isfile(full_path):
-                        try:
-                            log_signal.emit(f"[DEBUG] Arquivo encontrado: {f}")  # DEBUG
-                        except:
-                            pass
-                        if f.lower().endswith(('.jpg', '.png', '.jpeg', '.webp', '.gif', '.bmp')):
-                            image_files.append(full_path)
-                        else:
-                            try:
-                                log_signal.emit(f"[DEBUG] Arquivo ignorado (sem extensao): {f}")  # DEBUG
-                            except:
-                                pass
-            except Exception as list_err:
-                log_signal.emit(f"[ERRO] Ao listar pasta: {str(list_err)[:50]}")
-                return
-            
-            log_signal.emit(f"[INFO] Encontradas {len(image_files)} imagens. Processando...")
-            progress_signal.emit(55)
-            
-            min_dimension = 1080 if high_res else 480
-            
-            for filepath in image_files:
-                if downloaded_count >= max_images:
-                    try:
-                        log_signal.emit(f"[OK] Limite de {max_images} imagens atingido!")
-                    except:
-                        pass
-                    break
-                
-                processed_count += 1
-                filename = os.path.basename(filepath)
-                
-                try:
-                    log_signal.emit(f"Processando {processed_count}/{len(image_files)}: {filename}")
-                except:
-                    pass
-                
-                try:
-                    # Verificar se arquivo existe ANTES de tentar abrir
-                    if not os.path.exists(filepath):
-                        try:
-                            log_signal.emit(f"  [AVISO] Arquivo desapareceu: {filename}")
-                        except:
-                            pass
-                        continue
-                    
-                    try:
-                        log_signal.emit(f"  [DEBUG] Caminho completo: {filepath}")  # DEBUG
-                    except:
-                        pass
-                    
-                    # Ler arquivo
-                    with open(filepath, 'rb') as f:
-                        image_data = f.read()
-                    
-                    log_signal.emit(f"  [DEBUG] Arquivo lido, tamanho: {len(image_data)} bytes")
-                    
-                    # Validar tamanho minimo (1KB)
-                    if len(image_data) < 1000:
+                while downloaded_count < max_images:
+                    if stop_event is not None and stop_event.is_set():
+                        log.warning("[AVISO] Job interrompido")
+                        break
+
+                    # Alimentar o pool com os arquivos ja baixados
+                    while len(pending) < max_in_flight:
                         try:
-                            log_signal.emit(f"  Ignorado: tamanho pequeno ({len(image_data)} bytes)")
-                        except:
-                            pass
-                        continue
-                    
-                    # Calcular hash
-                    file_hash = self._calculate_hash(image_data)
-                    
-                    # Verificar duplicidade
-                    if db_manager.is_hash_downloaded(file_hash):
+                            filepath, file_hash = candidates.get_nowait()
+                        except queue.Empty:
+                            break
+                        pending.add(pool.submit(validate_candidate, filepath, min_dimension,
+                                                file_hash=file_hash))
+
+                    if not pending:
+                        # Crawler terminou e nao ha mais nada na fila
+                        if not crawl_thread.is_alive() and candidates.empty():
+                            break
                         try:
-                            log_signal.emit(f"  Ignorado: imagem JA BAIXADA (duplicada)")
-                        except:
-                            pass
+                            filepath, file_hash = candidates.get(timeout=0.5)
+                        except queue.Empty:
+                            continue
+                        pending.add(pool.submit(validate_candidate, filepath, min_dimension,
+                                                file_hash=file_hash))
                         continue
-                    
-                    # Validar imagem
-                    try:
-                        img = Image.open(BytesIO(image_data))
-                        width, height = img.size
-                        largest_side = max(width, height)
-                        
-                        # Log de dimensoes
+
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                    # Uma unica consulta ao BD para todos os hashes do lote concluido
+                    done_hashes = []
+                    for future in done:
+                        if future.exception() is None and future.result()['hash']:
+                            done_hashes.append(future.result()['hash'])
+                    known_hashes = db_manager.is_hash_downloaded_many(done_hashes)
+
+                    for future in done:
+                        if downloaded_count >= max_images:
+                            break
+
+                        processed_count += 1
+                        plan.processed = processed_count
+                        result = None
                         try:
-                            log_signal.emit(f"  Dimensoes: {width}x{height} (maior: {largest_side}px)")
-                        except:
-                            pass
-                        
-                        if largest_side < min_dimension:
-                            try:
-                                log_signal.emit(f"  Ignorado: muito pequena (minimo: {min_dimension}px)")
-                            except:
-                                pass
+                            result = future.result()
+                            log.debug(f"Processando {processed_count}: {os.path.basename(result['path'])}")
+                            saved = self._accept_candidate(result, term, db_manager, known_hashes, log)
+                        except Exception as e:
+                            log.error(f"  [ERRO] {type(e).__name__}: {str(e)[:50]}")
+                            if result is not None:
+                                checkpoint.set_verdict(result['path'], False)
                             continue
-                        
-                        ext = img.format.lower() if img.format else 'jpg'
-                        if ext == 'jpeg':
-                            ext = 'jpg'
-                        elif ext not in ['png', 'webp', 'gif', 'bmp', 'jpg']:
-                            ext = 'jpg'
-                    except Exception as img_err:
-                        try:
-                            log_signal.emit(f"  Ignorado: nao e imagem valida ({type(img_err).__name__}: {str(img_err)[:30]})")
-                        except:
-                            pass
-                        continue
-                    
-                    # Salvar no diretorio final
-                    final_filename = f"{term.replace(' ', '_')}_{file_hash[:8]}_{int(time.time())}.{ext}"
-                    final_filepath = os.path.join(self.image_dir, final_filename)
-                    
-                    with open(final_filepath, 'wb') as f:
-                        f.write(image_data)
-                    
-                    # Registrar no DB
-                    db_manager.add_downloaded_hash(file_hash, term)
-                    downloaded_count += 1
-                    try:
-                        log_signal.emit(f"  [SALVA] Imagem {downloaded_count}/{max_images} ({width}x{height})")
-                    except:
-                        pass
-                
-                except Exception as e:
-                    try:
-                        log_signal.emit(f"  [ERRO] {type(e).__name__}: {str(e)[:50]}")
-                    except:
-                        pass
-                    continue
-                
-                # Progresso
-                progress = 55 + int((downloaded_count / max_images) * 40) if max_images > 0 else 55
-                progress_signal.emit(min(progress, 95))
-                time.sleep(0.1)
+                        self._record_verdict(checkpoint, result, term, saved)
+                        url = checkpoint.url_for(result['path'])
+                        plan.add_verdict(normalize_url(url) if url else None, saved)
+
+                        if saved:
+                            downloaded_count += 1
+                            plan.saved = downloaded_count
+                            if on_saved is not None:
+                                on_saved(downloaded_count)
+                            log.info(f"  [SALVA] Imagem {downloaded_count}/{max_images} ({result['width']}x{result['height']})")
+
+                        # Progresso
+                        progress = 30 + int((downloaded_count / max_images) * 65) if max_images > 0 else 30
+                        progress_signal.emit(min(progress, 95))
+            finally:
+                for future in pending:
+                    future.cancel()
+                pool.shutdown(wait=True)
+                # Interromper o crawler (se ainda estiver rodando) e aguardar as threads,
+                # inclusive quando o processamento falha no meio
+                bing_crawler.downloader.stop()
+                if crawl_thread.is_alive():
+                    crawl_thread.join(timeout=30)
+                # Gravar os hashes pendentes numa unica transacao
+                db_manager.flush_hashes()
+
+            if checkpoint.skipped_urls:
+                log.info(f"[INFO] {checkpoint.skipped_urls} URL(s) ja baixada(s) antes puladas "
+                         f"(~{checkpoint.bytes_saved / (1024 * 1024):.1f} MB economizados)")
+                if job_id is not None:
+                    db_manager.add_scrape_job_bytes_saved(job_id, checkpoint.bytes_saved)
+
+            if downloaded_count >= max_images:
+                log.info(f"[OK] Limite de {max_images} imagens atingido!")
             
-            # Limpar pasta temporaria APOS terminar de processar
-            try:
-                shutil.rmtree(temp_dir)
-            except:
-                pass
+            # Limpar pasta temporaria e o progresso do job APOS terminar de processar
+            # (se o job foi interrompido, ficam para a proxima execucao)
+            if stop_event is None or not stop_event.is_set():
+                try:
+                    shutil.rmtree(temp_dir)
+                except:
+                    pass
+                checkpoint.clear()
             
             progress_signal.emit(100)
             
             if downloaded_count == max_images:
-                try:
-                    log_signal.emit(f"[OK] SUCESSO! {downloaded_count}/{max_images} imagens salvas em {self.image_dir}")
-                except:
-                    pass
+                log.info(f"[OK] SUCESSO! {downloaded_count}/{max_images} imagens salvas em {self.image_dir}")
             elif downloaded_count > 0:
-                try:
-                    log_signal.emit(f"[AVISO] Parcial: {downloaded_count}/{max_images} imagens salvas em {self.image_dir}")
-                except:
-                    pass
+                log.warning(f"[AVISO] Parcial: {downloaded_count}/{max_images} imagens salvas em {self.image_dir}")
             else:
-                try:
-                    log_signal.emit("[ERRO] Nenhuma imagem valida foi salva.")
-                except:
-                    pass
+                log.error("[ERRO] Nenhuma imagem valida foi salva.")
+            return downloaded_count
         
         except Exception as e:
-            log_signal.emit(f"[ERRO] {str(e)[:100]}")
+            log.error(f"[ERRO] {str(e)[:100]}")
             progress_signal.emit(100)
+            return 0
+        finally:
+            if http_session is not None:
+                self._release_http_session(http_session)
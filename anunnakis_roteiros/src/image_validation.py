@@ -0,0 +1,124 @@
+"""Etapa de validação e hash das imagens candidatas.
+
+Tudo aqui é CPU (leitura, MD5, decodificação, dHash) e não depende do banco de
+dados, então pode rodar em threads ou processos separados. As decisões de
+duplicidade e a gravação no BD continuam no ImageScraper, numa única thread.
+"""
+import os
+import hashlib
+
+from PIL import Image
+
+from .image_hashing import compute_dhash
+from .image_probe import probe_image
+
+VALID_EXTENSIONS = ('.jpg', '.png', '.jpeg', '.webp', '.gif', '.bmp')
+MIN_FILE_SIZE = 1000  # 1KB
+# Proteção contra "decompression bombs": acima disso a imagem nem é decodificada
+MAX_PIXELS = 50_000_000
+# Só o JPEG decodifica já reduzido (draft); os demais formatos são lidos inteiros
+# para o dHash, então o limite é menor (16 MP em RGBA = 64 MB por candidata)
+MAX_FULL_DECODE_PIXELS = 16_000_000
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_md5(filepath):
+    """MD5 do arquivo lido em blocos (memória constante, qualquer tamanho)."""
+    digest = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _probe_with_pil(filepath):
+    """Fallback para formatos que o probe não reconhece: Image.open só lê o cabeçalho."""
+    with Image.open(filepath) as img:
+        return (img.format or '').lower(), img.size[0], img.size[1]
+
+
+def validate_candidate(filepath, min_dimension, max_pixels=MAX_PIXELS, file_hash=None,
+                       max_full_decode_pixels=MAX_FULL_DECODE_PIXELS):
+    """Valida e calcula os hashes de uma imagem baixada.
+
+    As dimensões vêm só do cabeçalho, então arquivos pequenos demais, inválidos
+    ou gigantes são rejeitados sem ler o arquivo inteiro. O MD5 é calculado em
+    blocos (ou vem pronto em `file_hash`, calculado durante o download) e o
+    dHash usa decodificação reduzida, mantendo a memória por candidata limitada.
+
+    Retorna um dicionário (serializável, para funcionar com ProcessPoolExecutor):
+    - ok: True se a imagem pode ser salva (ainda falta checar duplicidade)
+    - reason: motivo da rejeição, quando ok é False
+    - path, size, hash, phash, width, height, ext
+    """
+    result = {
+        'ok': False,
+        'reason': None,
+        'path': filepath,
+        'size': 0,
+        'hash': None,
+        'phash': None,
+        'width': 0,
+        'height': 0,
+        'ext': None,
+    }
+    filename = os.path.basename(filepath)
+
+    if not filename.lower().endswith(VALID_EXTENSIONS):
+        result['reason'] = f"sem extensao de imagem ({filename})"
+        return result
+
+    # Verificar se arquivo existe ANTES de tentar abrir
+    if not os.path.exists(filepath):
+        result['reason'] = "arquivo desapareceu"
+        return result
+
+    # Validar tamanho minimo (1KB) sem abrir o arquivo
+    result['size'] = os.path.getsize(filepath)
+    if result['size'] < MIN_FILE_SIZE:
+        result['reason'] = f"tamanho pequeno ({result['size']} bytes)"
+        return result
+
+    # Dimensoes pelo cabecalho
+    try:
+        probe = probe_image(filepath) or _probe_with_pil(filepath)
+    except Exception as img_err:
+        result['reason'] = f"nao e imagem valida ({type(img_err).__name__}: {str(img_err)[:30]})"
+        return result
+
+    image_format, width, height = probe
+    result['width'], result['height'] = width, height
+
+    if max(width, height) < min_dimension:
+        result['reason'] = f"muito pequena (minimo: {min_dimension}px)"
+        return result
+
+    if width * height > max_pixels:
+        result['reason'] = f"grande demais ({width}x{height}, limite: {max_pixels} pixels)"
+        return result
+
+    if image_format not in ('jpeg', 'jpg') and width * height > max_full_decode_pixels:
+        result['reason'] = (f"grande demais para {image_format or 'este formato'} "
+                            f"({width}x{height}, limite: {max_full_decode_pixels} pixels)")
+        return result
+
+    ext = image_format or 'jpg'
+    if ext == 'jpeg':
+        ext = 'jpg'
+    elif ext not in ['png', 'webp', 'gif', 'bmp', 'jpg']:
+        ext = 'jpg'
+    result['ext'] = ext
+
+    # Calcular hash (se o downloader ainda não calculou)
+    result['hash'] = file_hash or _file_md5(filepath)
+
+    # Hash perceptual (calculado uma única vez por candidata); tambem confirma que a imagem decodifica
+    try:
+        with Image.open(filepath) as img:
+            result['phash'] = compute_dhash(img)
+    except Exception as img_err:
+        result['reason'] = f"nao e imagem valida ({type(img_err).__name__}: {str(img_err)[:30]})"
+        return result
+
+    result['ok'] = True
+    return result
@@ -0,0 +1,140 @@
+"""Fila persistente de jobs de scraping (vários termos, execução simultânea).
+
+Os jobs ficam na tabela `scrape_jobs` do mesmo BD dos hashes, então sobrevivem
+ao fechamento do app: jobs que estavam em execução voltam para pendente e são
+retomados, pedindo só as imagens que faltavam.
+Não depende de Qt; a interface recebe as atualizações pelos callbacks.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+
+from .callbacks import CallbackSignal
+from .db_manager import JOB_DONE, JOB_FAILED, JOB_PENDING
+
+# Intervalo (s) entre batimentos dos jobs em execução (ver JOB_HEARTBEAT_STALE_SECONDS)
+HEARTBEAT_INTERVAL = 30
+
+
+class ScrapeJobQueue:
+    def __init__(self, scraper, db_manager, concurrency=2, on_log=None, on_job_changed=None):
+        self.scraper = scraper
+        self.db_manager = db_manager
+        self.concurrency = concurrency
+        # on_log(job, mensagem) e on_job_changed(job_id) podem ser chamados de qualquer thread
+        self.on_log = on_log
+        self.on_job_changed = on_job_changed
+        self._stop_event = threading.Event()
+        self._workers = []
+        self._progress = {}
+        # Identifica os jobs desta fila no BD (outro processo pode usar a mesma fila)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Jobs que esta fila pegou para executar, na ordem
+        self.claimed_job_ids = []
+        self._heartbeat = None
+
+    def add_terms(self, terms, max_images, high_res):
+        """Enfileira um job por termo (linhas vazias e repetidas são ignoradas)."""
+        unique_terms = list(dict.fromkeys(t.strip() for t in terms if t.strip()))
+        return self.db_manager.add_scrape_jobs(unique_terms, max_images, high_res)
+
+    def resume_interrupted(self):
+        """Devolve à fila os jobs interrompidos (sem batimento recente). Retorna quantos."""
+        return self.db_manager.reset_interrupted_scrape_jobs()
+
+    def is_running(self):
+        return any(worker.is_alive() for worker in self._workers)
+
+    def get_progress(self, job_id):
+        """Progresso (0-100) do job em execução, mantido só em memória."""
+        return self._progress.get(job_id, 0)
+
+    def start(self):
+        """Inicia os workers; cada um processa jobs pendentes até a fila esvaziar."""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"fila-scraper-{i + 1}", daemon=True)
+            for i in range(max(1, self.concurrency))
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="fila-batimento", daemon=True)
+        self._heartbeat.start()
+
+    def stop(self):
+        """Interrompe os jobs em execução; eles voltam para pendente."""
+        self._stop_event.set()
+
+    def wait(self, timeout=None):
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _notify(self, job_id):
+        if self.on_job_changed is not None:
+            self.on_job_changed(job_id)
+
+    def _heartbeat_loop(self):
+        # Enquanto houver worker vivo, marca os jobs desta fila como em andamento
+        last_beat = 0.0
+        while self.is_running():
+            if time.monotonic() - last_beat >= HEARTBEAT_INTERVAL:
+                self.db_manager.touch_scrape_jobs(self.owner)
+                last_beat = time.monotonic()
+            time.sleep(1)
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            job = self.db_manager.claim_next_scrape_job(self.owner)
+            if job is None and self.db_manager.reset_interrupted_scrape_jobs():
+                # Job de um processo que parou de dar sinal depois que esta fila abriu
+                job = self.db_manager.claim_next_scrape_job(self.owner)
+            if job is None:
+                break
+            self.claimed_job_ids.append(job["id"])
+            self._notify(job["id"])
+            self._run_job(job)
+            self._notify(job["id"])
+
+    def _run_job(self, job):
+        job_id = job["id"]
+        already_saved = job["saved_count"] or 0
+        remaining = job["max_images"] - already_saved
+
+        def log(message):
+            if self.on_log is not None:
+                self.on_log(job, message)
+
+        def progress(value):
+            self._progress[job_id] = value
+
+        def saved(count):
+            self.db_manager.update_scrape_job(job_id, saved_count=already_saved + count)
+            self._notify(job_id)
+
+        try:
+            count = self.scraper.scrape_images(
+                job["term"], remaining, bool(job["high_res"]),
+                CallbackSignal(log), CallbackSignal(progress),
+                job_id=job_id, on_saved=saved, stop_event=self._stop_event
+            )
+            total = already_saved + (count or 0)
+            if self._stop_event.is_set():
+                self.db_manager.update_scrape_job(
+                    job_id, status=JOB_PENDING, owner=None, saved_count=total, message="Interrompido"
+                )
+            else:
+                message = f"{total}/{job['max_images']} imagens salvas"
+                bytes_saved = (self.db_manager.get_scrape_job(job_id) or {}).get("bytes_saved")
+                if bytes_saved:
+                    message += f" ({bytes_saved / (1024 * 1024):.1f} MB economizados)"
+                self.db_manager.update_scrape_job(
+                    job_id, status=JOB_DONE, saved_count=total, message=message
+                )
+        except Exception as e:
+            self.db_manager.update_scrape_job(job_id, status=JOB_FAILED, message=str(e)[:200])
+        finally:
+            self._progress.pop(job_id, None)
@@ -1,21 +1,39 @@
+import os
 import sys
+import time
 from datetime import datetime
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QTabWidget, QLineEdit, QPushButton,
                                QTextEdit, QLabel, QComboBox, QFileDialog,
-                               QProgressBar, QListWidget, QListWidgetItem,
-                               QMessageBox, QSplitter, QSpinBox)
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QFont, QColor, QPalette, QIcon
-
-from .db_manager import DatabaseManager
-from .gemini_generator import GeminiGenerator
+                               QProgressBar, QListView,
+                               QMessageBox, QSplitter, QSpinBox, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QCheckBox,
+                               QPlainTextEdit)
+from PySide6.QtCore import Qt, QThread, Signal, QObject, QTimer, QEvent, QSize, QUrl, QStandardPaths
+from PySide6.QtGui import QFont, QColor, QPalette, QIcon, QTextCursor, QDesktopServices
+
+from .db_manager import DatabaseManager, JOB_RUNNING
+from .gemini_generator import GeminiGenerator, SUGGESTED_PROMPTS
 from .image_scraper import ImageScraper
+from .gallery_model import GalleryModel
+from .http_pool import DownloadSettings
+from .job_queue import ScrapeJobQueue
+from .roteiros_model import RoteirosListModel
+from .scrape_log import LogBuffer, DEBUG, INFO, enable_debug_file, disable_debug_file
+from .thumbnails import THUMBNAIL_SIZE
+
+# Linhas mantidas no log do scraper (as mais antigas são descartadas)
+LOG_VIEW_MAX_LINES = 2000
+# Intervalo (ms) em que as linhas acumuladas são levadas para o log da interface
+LOG_FLUSH_INTERVAL_MS = 100
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_time=None):
         super().__init__()
+        # Instante em que o processo começou (para medir o tempo até a primeira pintura)
+        self.startup_time = startup_time or time.perf_counter()
+        self.first_paint_ms = None
         self.setWindowTitle("Anunnakis - Roteiros e Imagens")
         self.setGeometry(100, 100, 1400, 800)
 
@@ -29,9 +47,25 @@ class MainWindow(QMainWindow):
         self.set_dark_theme()
 
         # Inicializar os geradores e scrapers
-        self.gemini_generator = GeminiGenerator()
+        # O cliente Gemini (import do SDK + listagem de modelos pela rede) é
+        # inicializado em segundo plano depois que a janela aparece
+        self.gemini_generator = GeminiGenerator(lazy=True)
         self.image_scraper = ImageScraper(self.db_manager)
         self.current_roteiro_raw = None
+        self.first_token_ms = None
+
+        # Log do scraper: as threads só acumulam linhas no buffer, e um timer
+        # as leva para a interface num ritmo fixo (ver flush_scraper_log)
+        self.scraper_log_buffer = LogBuffer(max_lines=LOG_VIEW_MAX_LINES)
+
+        # Fila persistente de termos; os callbacks vêm de outras threads e
+        # passam para a thread da interface pelos sinais de JobQueueSignals
+        self.queue_signals = JobQueueSignals()
+        self.job_queue = ScrapeJobQueue(
+            self.image_scraper, self.db_manager,
+            on_log=lambda job, msg: self.scraper_log_buffer.append(f"[{job['term']}] {msg}"),
+            on_job_changed=self.queue_signals.job_changed.emit
+        )
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -47,6 +81,16 @@ class MainWindow(QMainWindow):
         self.create_roteiro_tab()
         self.create_roteiros_library_tab()
         self.create_scraper_tab()
+        self.create_gallery_tab()
+
+        QTimer.singleShot(0, self.start_gemini_initialization)
+
+        # Retomar jobs que estavam em execução quando o app foi fechado
+        interrupted = self.job_queue.resume_interrupted()
+        self.refresh_jobs_table()
+        if interrupted:
+            self.status_label_scraper.setText(f"🔁 Retomando {interrupted} job(s) interrompido(s)...")
+            self.start_job_queue()
 
     def set_dark_theme(self):
         palette = QPalette()
@@ -117,13 +161,13 @@ class MainWindow(QMainWindow):
         QTextEdit:focus {
             border: 2px solid #1976D2;
         }
-        QListWidget {
+        QListView {
             background-color: #FFFFFF;
             color: #1E1E1E;
             border: 2px solid #BDBDBD;
             border-radius: 4px;
         }
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #1976D2;
             color: white;
         }
@@ -199,12 +243,68 @@ class MainWindow(QMainWindow):
 
         layout.addLayout(button_layout)
 
+        # Cache de respostas: prompts repetidos voltam do BD sem gastar cota
+        cache_layout = QHBoxLayout()
+        self.response_cache_checkbox = QCheckBox("♻️ Reaproveitar respostas em cache")
+        self.response_cache_checkbox.toggled.connect(self.toggle_response_cache)
+        cache_layout.addWidget(self.response_cache_checkbox)
+        self.force_regenerate_checkbox = QCheckBox("Forçar nova geração")
+        self.force_regenerate_checkbox.setEnabled(False)
+        cache_layout.addWidget(self.force_regenerate_checkbox)
+        self.streaming_checkbox = QCheckBox("📡 Exibir enquanto gera (streaming)")
+        self.streaming_checkbox.setChecked(True)
+        cache_layout.addWidget(self.streaming_checkbox)
+        self.hedging_checkbox = QCheckBox("⚡ Pedido extra se o modelo demorar (sem streaming)")
+        self.hedging_checkbox.toggled.connect(
+            lambda enabled: self.gemini_generator.enable_hedging() if enabled
+            else self.gemini_generator.enable_hedging(percentile=None)
+        )
+        cache_layout.addWidget(self.hedging_checkbox)
+        cache_layout.addStretch()
+        layout.addLayout(cache_layout)
+
         # ===== Seção de Status =====
-        self.status_label_roteiro = QLabel("✅ Pronto para gerar roteiros")
+        self.status_label_roteiro = QLabel("⏳ Conectando ao Gemini...")
         self.status_label_roteiro.setFont(QFont("Arial", 9))
         self.status_label_roteiro.setStyleSheet("color: #46A1C3;")
         layout.addWidget(self.status_label_roteiro)
 
+        layout.addSpacing(10)
+
+        # ===== Seção de Geração em Lote =====
+        batch_label = QLabel("GERAÇÃO EM LOTE (um prompt por linha)")
+        batch_label.setFont(QFont("Arial", 10, QFont.Bold))
+        batch_label.setStyleSheet("color: #46A1C3;")
+        layout.addWidget(batch_label)
+
+        self.batch_prompts_input = QTextEdit()
+        self.batch_prompts_input.setPlaceholderText("Um prompt por linha")
+        self.batch_prompts_input.setMaximumHeight(90)
+        layout.addWidget(self.batch_prompts_input)
+
+        batch_controls = QHBoxLayout()
+        self.batch_suggestions_button = QPushButton("📋 Usar Sugestões")
+        self.batch_suggestions_button.clicked.connect(
+            lambda: self.batch_prompts_input.setPlainText("\n".join(SUGGESTED_PROMPTS))
+        )
+        batch_controls.addWidget(self.batch_suggestions_button)
+        batch_controls.addWidget(QLabel("Simultâneos:"))
+        self.batch_concurrency_input = QSpinBox()
+        self.batch_concurrency_input.setMinimum(1)
+        self.batch_concurrency_input.setMaximum(10)
+        self.batch_concurrency_input.setValue(3)
+        batch_controls.addWidget(self.batch_concurrency_input)
+        self.batch_generate_button = QPushButton("📦 Gerar Lote")
+        self.batch_generate_button.clicked.connect(self.generate_roteiro_batch)
+        batch_controls.addWidget(self.batch_generate_button)
+        batch_controls.addStretch()
+        layout.addLayout(batch_controls)
+
+        self.batch_status_label = QLabel("")
+        self.batch_status_label.setFont(QFont("Arial", 9))
+        self.batch_status_label.setStyleSheet("color: #46A1C3;")
+        layout.addWidget(self.batch_status_label)
+
         layout.addSpacing(15)
 
         # ===== Seção de Visualização =====
@@ -237,6 +337,9 @@ class MainWindow(QMainWindow):
         self.save_roteiro_button = QPushButton("💾 Salvar Como Arquivo")
         self.save_roteiro_button.clicked.connect(self.save_roteiro_to_file)
         action_buttons.addWidget(self.save_roteiro_button)
+        self.model_health_button = QPushButton("🩺 Saúde dos Modelos")
+        self.model_health_button.clicked.connect(self.show_model_health)
+        action_buttons.addWidget(self.model_health_button)
         action_buttons.addStretch()
 
         layout.addLayout(action_buttons)
@@ -258,8 +361,22 @@ class MainWindow(QMainWindow):
         list_title.setStyleSheet("color: #46A1C3;")
         list_layout.addWidget(list_title)
 
-        self.roteiros_list = QListWidget()
-        self.roteiros_list.itemClicked.connect(self.on_roteiro_selected)
+        # Busca textual (FTS5); espera a digitação parar antes de consultar
+        self.roteiros_search_input = QLineEdit()
+        self.roteiros_search_input.setPlaceholderText("🔍 Buscar no título e no conteúdo...")
+        self.roteiros_search_timer = QTimer(self)
+        self.roteiros_search_timer.setSingleShot(True)
+        self.roteiros_search_timer.setInterval(250)
+        self.roteiros_search_timer.timeout.connect(self.search_roteiros)
+        self.roteiros_search_input.textChanged.connect(self.roteiros_search_timer.start)
+        list_layout.addWidget(self.roteiros_search_input)
+
+        # Lista virtualizada: as páginas de títulos vêm do BD conforme a rolagem
+        self.roteiros_model = RoteirosListModel(self.db_manager, parent=self)
+        self.roteiros_list = QListView()
+        self.roteiros_list.setUniformItemSizes(True)
+        self.roteiros_list.setModel(self.roteiros_model)
+        self.roteiros_list.clicked.connect(self.on_roteiro_selected)
         list_layout.addWidget(self.roteiros_list)
 
         # Botões de gerencimento
@@ -335,6 +452,42 @@ class MainWindow(QMainWindow):
         config_layout.addStretch()
         layout.addLayout(config_layout)
 
+        # Parâmetros de download (valem para os próximos jobs)
+        settings = self.image_scraper.download_settings
+        download_layout = QHBoxLayout()
+        download_layout.addWidget(QLabel("Downloads por job:"))
+        self.downloader_threads_input = QSpinBox()
+        self.downloader_threads_input.setRange(1, 32)
+        self.downloader_threads_input.setValue(settings.downloader_threads)
+        download_layout.addWidget(self.downloader_threads_input)
+
+        download_layout.addSpacing(20)
+        download_layout.addWidget(QLabel("Por servidor:"))
+        self.per_host_limit_input = QSpinBox()
+        self.per_host_limit_input.setRange(1, 32)
+        self.per_host_limit_input.setValue(settings.per_host_limit)
+        download_layout.addWidget(self.per_host_limit_input)
+
+        download_layout.addSpacing(20)
+        download_layout.addWidget(QLabel("Total:"))
+        self.global_limit_input = QSpinBox()
+        self.global_limit_input.setRange(1, 128)
+        self.global_limit_input.setValue(settings.global_limit)
+        download_layout.addWidget(self.global_limit_input)
+
+        download_layout.addSpacing(20)
+        download_layout.addWidget(QLabel("Timeout (s):"))
+        self.read_timeout_input = QSpinBox()
+        self.read_timeout_input.setRange(2, 120)
+        self.read_timeout_input.setValue(int(settings.read_timeout))
+        download_layout.addWidget(self.read_timeout_input)
+        download_layout.addStretch()
+        layout.addLayout(download_layout)
+
+        for spin_box in (self.downloader_threads_input, self.per_host_limit_input,
+                         self.global_limit_input, self.read_timeout_input):
+            spin_box.valueChanged.connect(self.apply_download_settings)
+
         # Pasta de salvamento
         folder_layout = QHBoxLayout()
         self.image_dir_label = QLabel(f"Pasta: {self.image_scraper.image_dir[:60]}...")
@@ -367,35 +520,127 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         layout.addWidget(self.progress_bar)
 
-        self.scraper_log = QTextEdit()
+        log_controls = QHBoxLayout()
+        log_controls.addWidget(QLabel("Log:"))
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItems(["Normal", "Detalhado (cada arquivo)"])
+        self.log_level_combo.currentIndexChanged.connect(self.change_scraper_log_level)
+        log_controls.addWidget(self.log_level_combo)
+        self.debug_file_checkbox = QCheckBox("📝 Salvar log detalhado em arquivo")
+        self.debug_file_checkbox.toggled.connect(self.toggle_debug_log_file)
+        log_controls.addWidget(self.debug_file_checkbox)
+        log_controls.addStretch()
+        layout.addLayout(log_controls)
+
+        # Visualização limitada: só as últimas LOG_VIEW_MAX_LINES linhas
+        self.scraper_log = QPlainTextEdit()
         self.scraper_log.setReadOnly(True)
         self.scraper_log.setFont(QFont("Monospace", 9))
         self.scraper_log.setMaximumHeight(200)
+        self.scraper_log.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
         layout.addWidget(self.scraper_log)
 
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_flush_timer.timeout.connect(self.flush_scraper_log)
+        self.log_flush_timer.start()
+
         self.status_label_scraper = QLabel("✅ Pronto para fazer busca")
         self.status_label_scraper.setFont(QFont("Arial", 9))
         self.status_label_scraper.setStyleSheet("color: #46A1C3;")
         layout.addWidget(self.status_label_scraper)
 
+        layout.addSpacing(10)
+
+        # ===== Fila de termos =====
+        queue_title = QLabel("FILA DE TERMOS")
+        queue_title.setFont(QFont("Arial", 10, QFont.Bold))
+        queue_title.setStyleSheet("color: #46A1C3;")
+        layout.addWidget(queue_title)
+
+        queue_layout = QHBoxLayout()
+        self.queue_terms_input = QTextEdit()
+        self.queue_terms_input.setPlaceholderText("Um termo por linha (usa Máx. Imagens e Resolução acima)")
+        self.queue_terms_input.setMaximumHeight(120)
+        queue_layout.addWidget(self.queue_terms_input)
+
+        queue_buttons = QVBoxLayout()
+        add_to_queue_btn = QPushButton("➕ Adicionar à fila")
+        add_to_queue_btn.clicked.connect(self.add_terms_to_queue)
+        queue_buttons.addWidget(add_to_queue_btn)
+
+        concurrency_layout = QHBoxLayout()
+        concurrency_layout.addWidget(QLabel("Simultâneos:"))
+        self.queue_concurrency_input = QSpinBox()
+        self.queue_concurrency_input.setMinimum(1)
+        self.queue_concurrency_input.setMaximum(8)
+        self.queue_concurrency_input.setValue(self.job_queue.concurrency)
+        concurrency_layout.addWidget(self.queue_concurrency_input)
+        queue_buttons.addLayout(concurrency_layout)
+
+        self.start_queue_button = QPushButton("▶️ Iniciar fila")
+        self.start_queue_button.clicked.connect(self.start_job_queue)
+        queue_buttons.addWidget(self.start_queue_button)
+
+        self.stop_queue_button = QPushButton("⏸️ Pausar fila")
+        self.stop_queue_button.clicked.connect(self.stop_job_queue)
+        queue_buttons.addWidget(self.stop_queue_button)
+
+        clear_queue_btn = QPushButton("🧹 Limpar concluídos")
+        clear_queue_btn.clicked.connect(self.clear_finished_jobs)
+        queue_buttons.addWidget(clear_queue_btn)
+        queue_layout.addLayout(queue_buttons)
+        layout.addLayout(queue_layout)
+
+        self.jobs_table = QTableWidget(0, 5)
+        self.jobs_table.setHorizontalHeaderLabels(["Termo", "Resolução", "Status", "Salvas", "Mensagem"])
+        self.jobs_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.jobs_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.jobs_table)
+
+        self.queue_signals.job_changed.connect(lambda _job_id: self.refresh_jobs_table())
+
+        # Atualiza o progresso dos jobs em execução enquanto a fila roda
+        self.queue_timer = QTimer(self)
+        self.queue_timer.setInterval(1000)
+        self.queue_timer.timeout.connect(self.refresh_jobs_table)
+
+    def event(self, event):
+        """Registra o tempo até a primeira pintura da janela"""
+        if event.type() == QEvent.Paint and self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - self.startup_time) * 1000
+            print(f"[STARTUP] Primeira pintura da janela em {self.first_paint_ms:.0f} ms")
+            self.statusBar().showMessage(f"Janela pronta em {self.first_paint_ms:.0f} ms", 5000)
+        return super().event(event)
+
+    def start_gemini_initialization(self):
+        """Inicializa o cliente Gemini numa thread, sem travar a janela"""
+        self.gemini_init_thread = GeminiInitThread(self.gemini_generator)
+        self.gemini_init_thread.finished_init.connect(self.handle_gemini_ready)
+        self.gemini_init_thread.start()
+
+    def handle_gemini_ready(self, elapsed_ms):
+        """Atualiza o status quando o Gemini termina de inicializar"""
+        if self.gemini_generator.client:
+            self.status_label_roteiro.setText(
+                f"✅ Pronto para gerar roteiros (modelo {self.gemini_generator.model}, {elapsed_ms:.0f} ms)"
+            )
+        else:
+            self.status_label_roteiro.setText("⚠️ Gemini não inicializado. Verifique a GEMINI_API_KEY.")
+
     # --- Métodos de Roteiro ---
 
+    def toggle_response_cache(self, enabled):
+        """Liga/desliga o cache de respostas do Gemini"""
+        self.gemini_generator.enable_response_cache(self.db_manager if enabled else None)
+        self.force_regenerate_checkbox.setEnabled(enabled)
+        if not enabled:
+            self.force_regenerate_checkbox.setChecked(False)
+
     def generate_random_prompt(self):
         """Gera um prompt aleatório e inicia a geração"""
         import random
-        prompts = [
-            "Gere um roteiro detalhado sobre a mitologia Anunnaki e sua presença na história humana",
-            "Crie um roteiro educativo explicando quem são os Anunnaki de acordo com textos sumérios",
-            "Desenvolva um roteiro explorando a teoria de que os Anunnaki visitaram a Terra",
-            "Elabore um roteiro sobre os textos históricos e como descrevem os Anunnaki",
-            "Gere um roteiro cobrindo as teorias sobre os Anunnaki e antigas civilizações",
-            "Crie um roteiro comparando mitologias Anunnaki com outras civilizações",
-            "Desenvolva um roteiro sobre símbolos Anunnaki encontrados em artefatos antigos",
-            "Gere um roteiro explicando a genealogia dos Anunnaki",
-            "Elabore um roteiro sobre tecnologia antiga e os Anunnaki",
-            "Crie um roteiro explorando o papel dos Anunnaki em diferentes religiões"
-        ]
-        prompt = random.choice(prompts)
+        prompt = random.choice(SUGGESTED_PROMPTS)
         self.roteiro_prompt.setText(prompt)
         self.generate_roteiro()
 
@@ -417,10 +662,28 @@ class MainWindow(QMainWindow):
         self.generate_button.setEnabled(False)
         self.random_prompt_button.setEnabled(False)
 
-        self.roteiro_thread = RoteiroThread(self.gemini_generator, prompt)
+        self.generation_start = time.perf_counter()
+        self.first_token_ms = None
+        force = self.force_regenerate_checkbox.isChecked()
+        stream = self.streaming_checkbox.isChecked()
+        if stream:
+            self.roteiro_text_edit.clear()
+        self.roteiro_thread = RoteiroThread(self.gemini_generator, prompt, force=force, stream=stream)
+        self.roteiro_thread.chunk_received.connect(self.handle_roteiro_chunk)
         self.roteiro_thread.generation_finished.connect(self.handle_roteiro_result)
         self.roteiro_thread.start()
 
+    def handle_roteiro_chunk(self, text):
+        """Acrescenta ao editor um trecho recebido pelo streaming"""
+        if self.first_token_ms is None:
+            self.first_token_ms = (time.perf_counter() - self.generation_start) * 1000
+            self.status_label_roteiro.setText(
+                f"✍️ Recebendo roteiro... (primeiro trecho em {self.first_token_ms:.0f} ms)"
+            )
+        cursor = self.roteiro_text_edit.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
     def handle_roteiro_result(self, result):
         """Processa resultado da geração"""
         self.generate_button.setEnabled(True)
@@ -433,7 +696,14 @@ class MainWindow(QMainWindow):
             try:
                 title = self.roteiro_prompt.text().strip() or f"Roteiro {datetime.now().strftime('%d/%m %H:%M')}"
                 self.db_manager.save_roteiro(title, result)
-                self.status_label_roteiro.setText(f"✅ Roteiro salvo automaticamente: {title}")
+                origin = "do cache, " if self.gemini_generator.last_from_cache else ""
+                elapsed_ms = (time.perf_counter() - self.generation_start) * 1000
+                first_token = ""
+                if self.first_token_ms is not None and not self.gemini_generator.last_from_cache:
+                    first_token = f", primeiro trecho em {self.first_token_ms:.0f} ms"
+                self.status_label_roteiro.setText(
+                    f"✅ Roteiro salvo automaticamente: {title} ({origin}{elapsed_ms:.0f} ms{first_token})"
+                )
             except Exception as e:
                 self.status_label_roteiro.setText(f"⚠️ Roteiro gerado mas erro ao salvar: {e}")
             
@@ -442,6 +712,69 @@ class MainWindow(QMainWindow):
             self.status_label_roteiro.setText(f"❌ Erro na geração: {result}")
             self.roteiro_text_edit.setText(f"ERRO: {result}")
 
+    def generate_roteiro_batch(self):
+        """Gera em paralelo todos os prompts da caixa de lote"""
+        prompts = [line.strip() for line in self.batch_prompts_input.toPlainText().splitlines() if line.strip()]
+        if not prompts:
+            QMessageBox.warning(self, "Aviso", "Informe ao menos um prompt (ou use as sugestões)")
+            return
+
+        self.batch_total = len(prompts)
+        self.batch_done = 0
+        self.batch_failed = 0
+        self.batch_start = time.perf_counter()
+        self.batch_generate_button.setEnabled(False)
+        self.batch_status_label.setText(f"⏳ Lote: 0/{self.batch_total} prontos...")
+
+        self.batch_thread = BatchRoteiroThread(
+            self.gemini_generator, self.db_manager, prompts,
+            self.batch_concurrency_input.value(), force=self.force_regenerate_checkbox.isChecked()
+        )
+        self.batch_thread.result_ready.connect(self.handle_batch_result)
+        self.batch_thread.batch_finished.connect(self.handle_batch_finished)
+        self.batch_thread.start()
+
+    def handle_batch_result(self, prompt, error):
+        """Um roteiro do lote terminou (já salvo no BD pela thread)"""
+        self.batch_done += 1
+        if error:
+            self.batch_failed += 1
+            print(f"Erro no lote ({prompt}): {error}")
+        elapsed = time.perf_counter() - self.batch_start
+        rate = (self.batch_done - self.batch_failed) * 60 / elapsed if elapsed > 0 else 0
+        errors = f", {self.batch_failed} erro(s)" if self.batch_failed else ""
+        self.batch_status_label.setText(
+            f"⏳ Lote: {self.batch_done}/{self.batch_total} prontos{errors} — {rate:.1f} roteiros/min"
+        )
+
+    def handle_batch_finished(self, summary):
+        self.batch_generate_button.setEnabled(True)
+        if "error" in summary:
+            self.batch_status_label.setText(f"❌ Erro no lote: {summary['error']}")
+            return
+        errors = f", {summary['failed']} erro(s)" if summary["failed"] else ""
+        self.batch_status_label.setText(
+            f"✅ Lote concluído: {summary['ok']}/{summary['total']} em "
+            f"{summary['elapsed_seconds']:.0f} s{errors} — {summary['per_minute']:.1f} roteiros/min"
+        )
+        self.load_roteiros_list()
+
+    def show_model_health(self):
+        """Mostra latência, taxa de erro e cooldown dos modelos Gemini"""
+        stats = self.gemini_generator.get_model_health()
+        if not stats:
+            QMessageBox.information(self, "Saúde dos Modelos", "Nenhum modelo foi usado ainda.")
+            return
+        lines = []
+        for item in stats:
+            latency = f"{item['latency_ms']} ms" if item["latency_ms"] is not None else "-"
+            line = (f"{item['model']}: latência {latency}, erros {item['error_rate']:.0%} "
+                    f"({item['failures']}/{item['calls']})")
+            if item["cooldown_seconds"]:
+                line += f", em espera por {item['cooldown_seconds']:.0f} s"
+            lines.append(line)
+        QMessageBox.information(self, "Saúde dos Modelos", "\n".join(lines))
+
     def update_roteiro_view(self):
         """Atualiza visualização do roteiro"""
         if not self.current_roteiro_raw:
@@ -469,24 +802,23 @@ class MainWindow(QMainWindow):
                 self.status_label_roteiro.setText(f"❌ Erro ao salvar: {e}")
 
     def load_roteiros_list(self):
-        """Carrega lista de roteiros do banco de dados"""
-        self.roteiros_list.clear()
+        """Recarrega a primeira página da lista de roteiros"""
         try:
-            roteiros = self.db_manager.get_all_roteiros()
-            for roteiro in roteiros:
-                item = QListWidgetItem(f"📄 {roteiro['title']}")
-                item.setData(Qt.UserRole, roteiro['id'])
-                self.roteiros_list.addItem(item)
+            self.roteiros_model.reload()
         except Exception as e:
             QMessageBox.warning(self, "Erro", f"Erro ao carregar roteiros: {e}")
 
-    def on_roteiro_selected(self, item):
+    def search_roteiros(self):
+        """Aplica a busca digitada na lista de roteiros"""
+        try:
+            self.roteiros_model.set_search(self.roteiros_search_input.text())
+        except Exception as e:
+            QMessageBox.warning(self, "Erro", f"Erro na busca: {e}")
+
+    def on_roteiro_selected(self, index):
         """Quando um roteiro é selecionado na lista"""
         try:
-            roteiro_id = item.data(Qt.UserRole)
-            roteiros = self.db_manager.get_all_roteiros()
-            roteiro = next((r for r in roteiros if r['id'] == roteiro_id), None)
-            
+            roteiro = self.db_manager.get_roteiro(index.data(Qt.UserRole))
             if roteiro:
                 self.library_roteiro_text.setText(roteiro['content'])
         except Exception as e:
@@ -494,8 +826,8 @@ class MainWindow(QMainWindow):
 
     def delete_selected_roteiro(self):
         """Deleta o roteiro selecionado"""
-        current_item = self.roteiros_list.currentItem()
-        if not current_item:
+        current_index = self.roteiros_list.currentIndex()
+        if not current_index.isValid():
             QMessageBox.warning(self, "Aviso", "Selecione um roteiro para deletar")
             return
 
@@ -506,9 +838,9 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             try:
-                roteiro_id = current_item.data(Qt.UserRole)
+                roteiro_id = current_index.data(Qt.UserRole)
                 # Aqui você precisaria implementar um método delete no db_manager
-                self.roteiros_list.takeItem(self.roteiros_list.row(current_item))
+                self.roteiros_model.remove_row(current_index.row())
                 self.library_roteiro_text.clear()
                 QMessageBox.information(self, "Sucesso", "Roteiro deletado")
             except Exception as e:
@@ -531,6 +863,109 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.warning(self, "Erro", f"Erro ao exportar: {e}")
 
+    def create_gallery_tab(self):
+        """Aba com as imagens baixadas, em miniaturas"""
+        self.gallery_tab = QWidget()
+        self.tabs.addTab(self.gallery_tab, "🗂️ Galeria")
+
+        layout = QVBoxLayout(self.gallery_tab)
+        layout.setSpacing(10)
+        layout.setContentsMargins(15, 15, 15, 15)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Termo:"))
+        self.gallery_term_combo = QComboBox()
+        self.gallery_term_combo.setMinimumWidth(250)
+        self.gallery_term_combo.currentIndexChanged.connect(self.change_gallery_term)
+        filter_layout.addWidget(self.gallery_term_combo)
+
+        refresh_gallery_button = QPushButton("🔄 Atualizar")
+        refresh_gallery_button.clicked.connect(self.load_gallery)
+        filter_layout.addWidget(refresh_gallery_button)
+
+        self.gallery_count_label = QLabel("")
+        self.gallery_count_label.setStyleSheet("color: #46A1C3;")
+        filter_layout.addWidget(self.gallery_count_label)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        # Miniaturas geradas em segundo plano e guardadas no cache local do usuário
+        # (não na pasta do BD, que fica no Google Drive)
+        cache_dir = (QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+                     or os.path.join(os.path.dirname(__file__), "cache"))
+        self.gallery_model = GalleryModel(
+            self.db_manager,
+            thumbnail_dir=os.path.join(cache_dir, "thumbs"),
+            image_dir=self.image_scraper.image_dir,
+            parent=self
+        )
+        self.gallery_view = QListView()
+        self.gallery_view.setViewMode(QListView.IconMode)
+        self.gallery_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.gallery_view.setGridSize(QSize(THUMBNAIL_SIZE + 30, THUMBNAIL_SIZE + 40))
+        self.gallery_view.setResizeMode(QListView.Adjust)
+        self.gallery_view.setMovement(QListView.Static)
+        self.gallery_view.setUniformItemSizes(True)
+        self.gallery_view.setWordWrap(False)
+        self.gallery_view.setModel(self.gallery_model)
+        self.gallery_view.doubleClicked.connect(self.open_gallery_image)
+        layout.addWidget(self.gallery_view)
+
+        # A galeria só consulta o BD quando a aba é aberta pela primeira vez
+        self.gallery_loaded = False
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.gallery_tab and not self.gallery_loaded:
+            self.load_gallery()
+
+    def load_gallery(self):
+        """Recarrega a lista de termos e a primeira página de imagens"""
+        self.gallery_loaded = True
+        current = self.gallery_term_combo.currentData()
+        try:
+            terms = self.db_manager.list_image_terms()
+        except Exception as e:
+            QMessageBox.warning(self, "Erro", f"Erro ao carregar galeria: {e}")
+            return
+        total = sum(count for _, count in terms)
+
+        self.gallery_term_combo.blockSignals(True)
+        self.gallery_term_combo.clear()
+        self.gallery_term_combo.addItem(f"Todas ({total})", None)
+        for term, count in terms:
+            self.gallery_term_combo.addItem(f"{term} ({count})", term)
+        selected = self.gallery_term_combo.findData(current) if current is not None else 0
+        self.gallery_term_combo.setCurrentIndex(max(selected, 0))
+        self.gallery_term_combo.blockSignals(False)
+
+        self.gallery_count_label.setText(f"{total} imagem(ns)")
+        self.gallery_model.set_image_dir(self.image_scraper.image_dir)
+        self.change_gallery_term()
+
+    def change_gallery_term(self):
+        self.gallery_model.set_term(self.gallery_term_combo.currentData())
+        self.gallery_view.scrollToTop()
+
+    def open_gallery_image(self, index):
+        """Abre a imagem no visualizador padrão do sistema"""
+        file_path = self.gallery_model.data(index, Qt.UserRole)
+        if not file_path or not os.path.exists(file_path):
+            QMessageBox.warning(self, "Aviso", "Arquivo da imagem não encontrado.")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(file_path))
+
+    def apply_download_settings(self):
+        """Aplica os parâmetros de download escolhidos na aba (próximos jobs)"""
+        current = self.image_scraper.download_settings
+        self.image_scraper.set_download_settings(DownloadSettings(
+            downloader_threads=self.downloader_threads_input.value(),
+            per_host_limit=self.per_host_limit_input.value(),
+            global_limit=self.global_limit_input.value(),
+            connect_timeout=current.connect_timeout,
+            read_timeout=self.read_timeout_input.value()
+        ))
+
     def choose_image_dir(self):
         """Escolhe diretório para salvar imagens"""
         dir_path = QFileDialog.getExistingDirectory(
@@ -553,11 +988,12 @@ class MainWindow(QMainWindow):
 
         self.scrape_button.setEnabled(False)
         self.progress_bar.setValue(0)
+        self.scraper_log_buffer.drain()
         self.scraper_log.clear()
         self.status_label_scraper.setText("⏳ Iniciando busca de imagens...")
 
-        self.scraper_thread = ScraperThread(self.image_scraper, term, max_images, high_res)
-        self.scraper_thread.update_log.connect(self.scraper_log.append)
+        self.scraper_thread = ScraperThread(self.image_scraper, term, max_images, high_res,
+                                            self.scraper_log_buffer.append)
         self.scraper_thread.update_progress.connect(self.progress_bar.setValue)
         self.scraper_thread.scraping_finished.connect(self.handle_scraping_result)
         self.scraper_thread.start()
@@ -567,35 +1003,177 @@ class MainWindow(QMainWindow):
         self.scrape_button.setEnabled(True)
         if success:
             self.status_label_scraper.setText(f"✅ {message}")
-            self.scraper_log.append("--- Busca Concluída ---")
+            self.scraper_log_buffer.append("--- Busca Concluída ---")
         else:
             self.status_label_scraper.setText(f"❌ {message}")
-            self.scraper_log.append(f"--- ERRO: {message} ---")
+            self.scraper_log_buffer.append(f"--- ERRO: {message} ---")
+
+    def flush_scraper_log(self):
+        """Leva ao widget, num único append, as linhas acumuladas desde o último ciclo"""
+        lines = self.scraper_log_buffer.drain()
+        if lines:
+            self.scraper_log.appendPlainText("\n".join(lines))
+
+    def change_scraper_log_level(self, index):
+        self.image_scraper.log_level = DEBUG if index == 1 else INFO
+
+    def toggle_debug_log_file(self, enabled):
+        """Grava (ou para de gravar) o log completo do scraper num arquivo rotativo"""
+        if not enabled:
+            disable_debug_file()
+            self.status_label_scraper.setText("📝 Log em arquivo desativado")
+            return
+        path = os.path.join(self.db_manager.base_dir, "scraper_debug.log")
+        try:
+            enable_debug_file(path)
+            self.status_label_scraper.setText(f"📝 Log detalhado em: {path}")
+        except OSError as e:
+            self.debug_file_checkbox.setChecked(False)
+            self.status_label_scraper.setText(f"❌ Erro ao abrir o arquivo de log: {e}")
+
+    # --- Métodos da Fila de Termos ---
+
+    def add_terms_to_queue(self):
+        """Adiciona os termos digitados (um por linha) à fila persistente"""
+        terms = self.queue_terms_input.toPlainText().splitlines()
+        max_images = self.max_images_input.value()
+        high_res = self.high_res_checkbox.currentText() == "Alta"
+
+        job_ids = self.job_queue.add_terms(terms, max_images, high_res)
+        if not job_ids:
+            self.status_label_scraper.setText("⚠️ Digite ao menos um termo na fila")
+            return
+
+        self.queue_terms_input.clear()
+        self.refresh_jobs_table()
+        self.status_label_scraper.setText(f"➕ {len(job_ids)} termo(s) adicionados à fila")
+
+    def start_job_queue(self):
+        """Inicia (ou retoma) o processamento da fila"""
+        self.job_queue.concurrency = self.queue_concurrency_input.value()
+        self.job_queue.start()
+        self.queue_timer.start()
+        self.status_label_scraper.setText(f"⏳ Fila em execução ({self.job_queue.concurrency} simultâneos)")
+
+    def stop_job_queue(self):
+        """Pausa a fila; os jobs interrompidos voltam para pendente"""
+        self.job_queue.stop()
+        self.status_label_scraper.setText("⏸️ Pausando a fila...")
+
+    def clear_finished_jobs(self):
+        self.db_manager.clear_finished_scrape_jobs()
+        self.refresh_jobs_table()
+
+    def refresh_jobs_table(self):
+        """Mostra o status de cada job da fila"""
+        jobs = self.db_manager.get_scrape_jobs()
+        self.jobs_table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            status = job["status"]
+            if status == JOB_RUNNING:
+                status = f"{status} ({self.job_queue.get_progress(job['id'])}%)"
+            values = [
+                job["term"],
+                "Alta" if job["high_res"] else "Qualquer",
+                status,
+                f"{job['saved_count']}/{job['max_images']}",
+                job["message"] or "",
+            ]
+            for column, value in enumerate(values):
+                self.jobs_table.setItem(row, column, QTableWidgetItem(value))
+
+        if not self.job_queue.is_running() and self.queue_timer.isActive():
+            self.queue_timer.stop()
+            self.status_label_scraper.setText("✅ Fila finalizada")
+
+    def closeEvent(self, event):
+        """Interrompe a fila ao fechar; os jobs são retomados na próxima abertura"""
+        if self.job_queue.is_running():
+            self.job_queue.stop()
+            self.job_queue.wait(timeout=5)
+        self.gallery_model.shutdown()
+        super().closeEvent(event)
 
 # --- Threads para Operações Assíncronas ---
 
+class JobQueueSignals(QObject):
+    job_changed = Signal(int)
+
+class GeminiInitThread(QThread):
+    finished_init = Signal(float)  # tempo de inicialização em ms
+
+    def __init__(self, generator):
+        super().__init__()
+        self.generator = generator
+
+    def run(self):
+        start = time.perf_counter()
+        self.generator.initialize()
+        self.finished_init.emit((time.perf_counter() - start) * 1000)
+
 class RoteiroThread(QThread):
     generation_finished = Signal(object) # object pode ser str (sucesso) ou Exception (erro)
+    chunk_received = Signal(str)  # trechos do modo streaming
 
-    def __init__(self, generator, prompt):
+    def __init__(self, generator, prompt, force=False, stream=False):
         super().__init__()
         self.generator = generator
         self.prompt = prompt
+        self.force = force
+        self.stream = stream
 
     def run(self):
         try:
-            result = self.generator.generate(self.prompt)
+            if self.stream:
+                result = self.generator.generate_stream(
+                    self.prompt, self.chunk_received.emit, force=self.force
+                )
+            else:
+                result = self.generator.generate(self.prompt, force=self.force)
             self.generation_finished.emit(result)
         except Exception as e:
             self.generation_finished.emit(e)
 
+class BatchRoteiroThread(QThread):
+    result_ready = Signal(str, str)  # prompt, mensagem de erro ("" se deu certo)
+    batch_finished = Signal(dict)
+
+    def __init__(self, generator, db_manager, prompts, max_concurrency, force=False):
+        super().__init__()
+        self.generator = generator
+        self.db_manager = db_manager
+        self.prompts = prompts
+        self.max_concurrency = max_concurrency
+        self.force = force
+
+    def on_result(self, prompt, result, seconds):
+        # Cada roteiro é salvo assim que fica pronto
+        if isinstance(result, Exception):
+            self.result_ready.emit(prompt, str(result))
+            return
+        try:
+            self.db_manager.save_roteiro(prompt, result)
+            self.result_ready.emit(prompt, "")
+        except Exception as e:
+            self.result_ready.emit(prompt, f"gerado mas erro ao salvar: {e}")
+
+    def run(self):
+        try:
+            summary = self.generator.generate_batch(
+                self.prompts, self.max_concurrency, on_result=self.on_result, force=self.force
+            )
+        except Exception as e:
+            summary = {"error": str(e)}
+        self.batch_finished.emit(summary)
+
 class ScraperThread(QThread):
-    update_log = Signal(str)
     update_progress = Signal(int)
     scraping_finished = Signal(bool, str)
 
-    def __init__(self, scraper, term, max_images, high_res):
+    def __init__(self, scraper, term, max_images, high_res, on_log):
         super().__init__()
+        # on_log é chamado nesta thread (ex.: LogBuffer.append), sem passar pelo loop do Qt
+        self.on_log = on_log
         self.scraper = scraper
         self.term = term
         self.max_images = max_images
@@ -603,7 +1181,7 @@ class ScraperThread(QThread):
 
     def run(self):
         try:
-            self.scraper.scrape_images(self.term, self.max_images, self.high_res, self.update_log, self.update_progress)
+            self.scraper.scrape_images(self.term, self.max_images, self.high_res, self.on_log, self.update_progress)
             self.scraping_finished.emit(True, "Web scraping de imagens concluído com sucesso.")
         except Exception as e:
             self.scraping_finished.emit(False, f"Erro durante o scraping: {e}")
@@ -0,0 +1,156 @@
+"""Saúde dos modelos Gemini usados na cadeia de fallback.
+
+Para cada modelo guarda a latência média (EWMA), a taxa de erro recente e um
+período de espera (cooldown) depois de "sobrecarregado"/"não encontrado".
+Modelos em espera são pulados até o prazo acabar, então um modelo lento ou
+quebrado deixa de custar uma ida e volta em toda geração.
+"""
+import threading
+import time
+from collections import deque
+
+# Tipos de falha (ver classify_error)
+FAILURE_NOT_FOUND = "not_found"
+FAILURE_OVERLOAD = "overload"
+FAILURE_ERROR = "error"
+# Erro do pedido (argumento inválido, chave da API), não do modelo: não conta na saúde
+FAILURE_REQUEST = "request"
+
+
+def classify_error(error):
+    """Classifica a exceção da API no mesmo critério usado pelo fallback do generate()."""
+    error_msg = str(error).lower()
+    if 'invalid_argument' in error_msg or 'api key not valid' in error_msg or 'api_key_invalid' in error_msg:
+        return FAILURE_REQUEST
+    if '404' in error_msg or 'not found' in error_msg or 'not available' in error_msg:
+        return FAILURE_NOT_FOUND
+    if ('overload' in error_msg or 'unavailable' in error_msg or 'busy' in error_msg
+            or '429' in error_msg or 'resource_exhausted' in error_msg or '503' in error_msg):
+        return FAILURE_OVERLOAD
+    return FAILURE_ERROR
+
+
+class ModelHealth:
+    def __init__(self, alpha=0.3, window=20, overload_cooldown=30, max_cooldown=600,
+                 not_found_cooldown=3600, error_threshold=3, latency_samples=50, clock=time.monotonic):
+        # alpha: peso da última chamada na média de latência
+        # window: quantas chamadas entram na taxa de erro
+        # latency_samples: latências guardadas para os percentis (ver latency_percentile)
+        # Sobrecargas seguidas dobram o cooldown (até max_cooldown); erros
+        # genéricos só abrem o circuito depois de error_threshold falhas seguidas.
+        self.alpha = alpha
+        self.window = window
+        self.overload_cooldown = overload_cooldown
+        self.max_cooldown = max_cooldown
+        self.not_found_cooldown = not_found_cooldown
+        self.error_threshold = error_threshold
+        self.latency_samples = latency_samples
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            state = {
+                "latency_ewma": None,
+                "latencies": deque(maxlen=self.latency_samples),
+                "outcomes": deque(maxlen=self.window),  # True = sucesso
+                "calls": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "cooldown_until": 0.0,
+                "last_error": None,
+            }
+            self._models[model] = state
+        return state
+
+    def record_success(self, model, latency):
+        with self._lock:
+            state = self._state(model)
+            if state["latency_ewma"] is None:
+                state["latency_ewma"] = latency
+            else:
+                state["latency_ewma"] += self.alpha * (latency - state["latency_ewma"])
+            state["latencies"].append(latency)
+            state["outcomes"].append(True)
+            state["calls"] += 1
+            state["consecutive_failures"] = 0
+            state["cooldown_until"] = 0.0
+
+    def record_failure(self, model, kind, error=None):
+        """Registra uma falha; retorna o cooldown aplicado em segundos (0 se nenhum)."""
+        with self._lock:
+            state = self._state(model)
+            if kind == FAILURE_REQUEST:
+                # O mesmo pedido falharia em qualquer modelo
+                state["last_error"] = str(error)[:200] if error is not None else kind
+                return 0
+            state["outcomes"].append(False)
+            state["calls"] += 1
+            state["failures"] += 1
+            state["consecutive_failures"] += 1
+            state["last_error"] = str(error)[:200] if error is not None else kind
+
+            if kind == FAILURE_NOT_FOUND:
+                cooldown = self.not_found_cooldown
+            elif kind == FAILURE_OVERLOAD:
+                cooldown = min(self.overload_cooldown * 2 ** (state["consecutive_failures"] - 1),
+                               self.max_cooldown)
+            elif state["consecutive_failures"] >= self.error_threshold:
+                cooldown = self.overload_cooldown
+            else:
+                cooldown = 0
+            if cooldown:
+                state["cooldown_until"] = self._clock() + cooldown
+            return cooldown
+
+    def latency_percentile(self, model, percentile, min_samples=5):
+        """Percentil das latências recentes (segundos) ou None se houver poucas amostras."""
+        with self._lock:
+            state = self._models.get(model)
+            if state is None or len(state["latencies"]) < min_samples:
+                return None
+            samples = sorted(state["latencies"])
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def is_available(self, model):
+        with self._lock:
+            state = self._models.get(model)
+            return state is None or state["cooldown_until"] <= self._clock()
+
+    def order(self, models):
+        """Filtra a cadeia de fallback: remove repetidos e modelos em cooldown.
+
+        Mantém a ordem de preferência. Se todos estiverem em cooldown, devolve
+        todos, começando pelo que sai da espera primeiro.
+        """
+        models = [m for m in dict.fromkeys(models) if m]
+        with self._lock:
+            now = self._clock()
+            available = [m for m in models
+                         if m not in self._models or self._models[m]["cooldown_until"] <= now]
+            if available:
+                return available
+            return sorted(models, key=lambda m: self._models[m]["cooldown_until"])
+
+    def stats(self):
+        """Lista com a saúde de cada modelo já usado (para a interface/CLI)."""
+        with self._lock:
+            now = self._clock()
+            result = []
+            for model, state in self._models.items():
+                outcomes = state["outcomes"]
+                error_rate = outcomes.count(False) / len(outcomes) if outcomes else 0.0
+                latency = state["latency_ewma"]
+                result.append({
+                    "model": model,
+                    "latency_ms": round(latency * 1000) if latency is not None else None,
+                    "error_rate": round(error_rate, 3),
+                    "calls": state["calls"],
+                    "failures": state["failures"],
+                    "cooldown_seconds": max(0.0, round(state["cooldown_until"] - now, 1)),
+                    "last_error": state["last_error"],
+                })
+            return result
@@ -0,0 +1,133 @@
+"""Parser de roteiros em uma única passada.
+
+Cada linha do texto bruto vira um token (texto sem marcação de duração, se é
+título, duração) e as linhas são agrupadas em cenas (título, duração,
+parágrafos). Os três modos de visualização são renderizados a partir desse
+resultado, que fica em cache por texto: trocar de modo não reprocessa o roteiro.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+DURATION_RE = re.compile(r'(\[Duração:.*?\])')
+# Partes de uma duração: "2 minutos", "1 min 30 s", "2-3 minutos" (usa o menor), "1h"
+_DURATION_PART_RE = re.compile(
+    r'(\d+(?:[.,]\d+)?)(?:\s*(?:-|–|a)\s*\d+(?:[.,]\d+)?)?\s*'
+    r'(h(?:ora)?s?|min(?:uto)?s?|s(?:eg(?:undo)?s?)?)\b',
+    re.IGNORECASE
+)
+_CLOCK_RE = re.compile(r'(\d+):(\d{2})')
+_UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1}
+
+MODE_DEFAULT = "Padrão (com marcações)"
+MODE_CLEAN = "Limpo (apenas parágrafos)"
+MODE_TIMED = "Com Tempos (para leitura)"
+
+# text: linha sem espaços nas pontas; clean: sem as marcações de duração
+# without_duration: sem a primeira marcação encontrada (e repetições dela)
+RoteiroLine = namedtuple("RoteiroLine", "text clean duration without_duration is_title")
+Scene = namedtuple("Scene", "title duration duration_seconds paragraphs")
+ParsedRoteiro = namedtuple("ParsedRoteiro", "lines scenes total_duration_seconds")
+
+
+def parse_duration(mark):
+    """Converte "[Duração: 2 minutos]" em segundos (0 se não reconhecer)."""
+    clock = _CLOCK_RE.search(mark)
+    if clock:
+        return int(clock.group(1)) * 60 + int(clock.group(2))
+    seconds = 0.0
+    for value, unit in _DURATION_PART_RE.findall(mark):
+        seconds += float(value.replace(',', '.')) * _UNIT_SECONDS[unit[0].lower()]
+    return int(round(seconds))
+
+
+def format_duration(seconds):
+    """Duração curta para a interface: "45 s", "12 min", "1 h 05 min"."""
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d} min"
+
+
+def _is_heading(line):
+    return line.is_title or line.duration is not None or line.text.startswith('#')
+
+
+@lru_cache(maxsize=32)
+def parse_roteiro(raw):
+    """Analisa o roteiro uma vez; o resultado é imutável e fica em cache por texto."""
+    lines = []
+    scenes = []
+    title = duration = None
+    paragraphs = []
+
+    def close_scene():
+        # Títulos soltos sem texto nem duração (ex.: o título geral do roteiro) não contam como cena
+        if duration is not None or paragraphs:
+            scenes.append(Scene(title, duration, parse_duration(duration) if duration else 0,
+                                tuple(paragraphs)))
+
+    for raw_line in raw.split('\n'):
+        text = raw_line.strip()
+        match = DURATION_RE.search(text)
+        duration_mark = match.group(1) if match else None
+        clean = DURATION_RE.sub('', text).strip() if duration_mark else text
+        line = RoteiroLine(
+            text=text,
+            clean=clean,
+            duration=duration_mark,
+            without_duration=text.replace(duration_mark, '').strip() if duration_mark else text,
+            is_title=bool(clean) and len(clean) < 80 and clean.isupper() and not clean.endswith('.')
+        )
+        lines.append(line)
+        if not text:
+            continue
+
+        if _is_heading(line):
+            # Título e duração em linhas seguidas pertencem à mesma cena
+            starts_new = (bool(paragraphs) or (bool(line.clean) and title is not None)
+                          or (duration_mark is not None and duration is not None))
+            if starts_new:
+                close_scene()
+                title = duration = None
+                paragraphs = []
+            if line.clean and title is None:
+                title = line.clean.strip('#* ')
+            if duration_mark and duration is None:
+                duration = duration_mark
+        else:
+            paragraphs.append(text)
+    close_scene()
+
+    total = sum(scene.duration_seconds for scene in scenes)
+    return ParsedRoteiro(tuple(lines), tuple(scenes), total)
+
+
+def render_roteiro(raw, mode):
+    """Renderiza o roteiro no modo de visualização pedido (mesma saída do formatador antigo)."""
+    if mode == MODE_CLEAN:
+        # Remove títulos de cena e marcações de duração
+        parsed = parse_roteiro(raw)
+        return '\n\n'.join(line.clean for line in parsed.lines if line.clean and not line.is_title)
+
+    if mode == MODE_TIMED:
+        # Destaca apenas os parágrafos e os tempos de leitura
+        parsed = parse_roteiro(raw)
+        formatted_lines = []
+        for line in parsed.lines:
+            if line.duration:
+                formatted_lines.append(f"--- {line.without_duration} --- {line.duration}\n")
+            elif line.text:
+                formatted_lines.append(line.text)
+        return '\n'.join(formatted_lines)
+
+    # Padrão (com marcações) e modos desconhecidos: o texto como veio
+    return raw
+
+
+def roteiro_stats(raw):
+    """Número de cenas e duração total em segundos (para salvar junto com o roteiro)."""
+    parsed = parse_roteiro(raw)
+    return len(parsed.scenes), parsed.total_duration_seconds
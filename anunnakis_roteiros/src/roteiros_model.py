@@ -0,0 +1,88 @@
+"""Modelo Qt da biblioteca de roteiros, carregado sob demanda.
+
+Só id, título, data, nº de cenas e duração vêm do BD, em páginas (paginação
+por chave); o QListView pede a próxima página via canFetchMore/fetchMore
+quando a rolagem chega ao fim.
+O conteúdo é buscado pelo id apenas quando um roteiro é selecionado.
+Com uma busca ativa (set_search), a lista mostra os resultados do FTS5 com
+o trecho encontrado.
+"""
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from .roteiro_parser import format_duration
+
+
+class RoteirosListModel(QAbstractListModel):
+    def __init__(self, db_manager, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.page_size = page_size
+        self._rows = []
+        self._exhausted = False
+        self._search = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        roteiro = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            text = f"📄 {roteiro['title']}"
+            if roteiro.get("scene_count"):
+                text += f"  ({roteiro['scene_count']} cenas"
+                if roteiro.get("total_duration_seconds"):
+                    text += f", {format_duration(roteiro['total_duration_seconds'])}"
+                text += ")"
+            if roteiro.get("snippet"):
+                # O trecho pode cruzar linhas do roteiro; mostra numa linha só
+                text += "\n    " + " ".join(roteiro["snippet"].split())
+            return text
+        if role == Qt.ToolTipRole:
+            return roteiro.get("snippet") or roteiro["created_at"]
+        if role == Qt.UserRole:
+            return roteiro["id"]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        before_id = self._rows[-1]["id"] if self._rows else None
+        page = self.db_manager.list_roteiros(self.page_size, before_id=before_id)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def reload(self):
+        """Descarta as páginas carregadas e busca a primeira de novo (ou refaz a busca)."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        if self._search:
+            # Os resultados da busca já vêm limitados e ordenados por relevância
+            self._rows = self.db_manager.search_roteiros(self._search, limit=self.page_size)
+            self._exhausted = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_search(self, query):
+        """Troca para os resultados da busca textual (texto vazio volta à lista completa)."""
+        self._search = query.strip()
+        self.reload()
+
+    def roteiro_id(self, row):
+        return self._rows[row]["id"]
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
@@ -0,0 +1,110 @@
+"""Log do scraper com níveis, buffer de agregação e arquivo de depuração opcional.
+
+O scraper gera várias linhas por arquivo; mandar cada uma como um sinal Qt
+(e um append no widget) trava a interface em jobs grandes. Aqui:
+
+* ScrapeLogger filtra por nível antes de emitir e centraliza o try/except;
+* LogBuffer junta as linhas de qualquer thread para a interface drenar num
+  ritmo fixo (um único append por ciclo), descartando o excesso;
+* enable_debug_file grava tudo, inclusive DEBUG, num arquivo rotativo.
+
+Não depende de Qt.
+"""
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from .callbacks import as_signal
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+# Logger do arquivo de depuração; sem handler nada é gravado (nem no stderr)
+file_logger = logging.getLogger("anunnakis.scraper")
+file_logger.addHandler(logging.NullHandler())
+file_logger.propagate = False
+
+_debug_handler = None
+
+
+class ScrapeLogger:
+    """Envia ao log_signal só as mensagens do nível configurado para cima."""
+
+    def __init__(self, log_signal, level=INFO):
+        self.signal = as_signal(log_signal)
+        self.level = level
+
+    def log(self, level, message):
+        if file_logger.isEnabledFor(level):
+            file_logger.log(level, message)
+        if level >= self.level:
+            try:
+                self.signal.emit(message)
+            except Exception:
+                pass
+
+    def debug(self, message):
+        self.log(DEBUG, message)
+
+    def info(self, message):
+        self.log(INFO, message)
+
+    def warning(self, message):
+        self.log(WARNING, message)
+
+    def error(self, message):
+        self.log(ERROR, message)
+
+
+class LogBuffer:
+    """Fila limitada de linhas de log, segura entre threads.
+
+    append() pode ser chamado de qualquer thread; a interface chama drain()
+    num timer. Se a fila encher, as linhas mais antigas são descartadas e o
+    próximo drain() informa quantas foram omitidas.
+    """
+
+    def __init__(self, max_lines=2000):
+        self._lines = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, line):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def drain(self):
+        """Retorna (e remove) as linhas acumuladas desde o último drain."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.insert(0, f"[... {dropped} linha(s) de log omitida(s) ...]")
+        return lines
+
+
+def enable_debug_file(path, max_bytes=5 * 1024 * 1024, backup_count=3):
+    """Grava todo o log do scraper (inclusive DEBUG) em `path`, com rotação por tamanho."""
+    global _debug_handler
+    disable_debug_file()
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(message)s"))
+    file_logger.addHandler(handler)
+    file_logger.setLevel(DEBUG)
+    _debug_handler = handler
+    return handler
+
+
+def disable_debug_file():
+    global _debug_handler
+    if _debug_handler is not None:
+        file_logger.removeHandler(_debug_handler)
+        _debug_handler.close()
+        _debug_handler = None
+    file_logger.setLevel(logging.NOTSET)
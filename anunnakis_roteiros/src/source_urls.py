@@ -0,0 +1,92 @@
+"""Índice das URLs de origem já baixadas, consultado antes de cada download.
+
+Os mesmos resultados populares do Bing voltam em toda busca; sem este índice
+cada um seria baixado e hasheado só para ser descartado como duplicado. A
+tabela `source_urls` guarda a URL normalizada, o veredito e o tamanho do
+arquivo (para contabilizar os bytes economizados); um LRU limitado em memória
+evita ir ao BD para as URLs consultadas com frequência.
+"""
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+SOURCE_ACCEPTED = "aceita"
+SOURCE_DUPLICATE = "duplicada"
+SOURCE_REJECTED = "rejeitada"   # inválida ou pequena demais
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+_MISSING = object()
+
+
+def normalize_url(url):
+    """Forma canônica da URL: esquema e host em minúsculas, sem porta padrão,
+    fragmento nem parâmetros de rastreamento, e com a query ordenada."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class SourceUrlIndex:
+    """URLs já vistas (BD) com um cache LRU limitado na frente. Seguro entre threads."""
+
+    def __init__(self, db_manager, max_cached=50000):
+        self.db_manager = db_manager
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """Retorna (status, size_bytes, max_dimension) da URL, ou None se nunca foi vista."""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._cache.get(key, _MISSING)
+            if entry is not _MISSING:
+                self._cache.move_to_end(key)
+                return entry
+        entry = self.db_manager.get_source_url(key)
+        entry = tuple(entry) if entry else None
+        self._remember(key, entry)
+        return entry
+
+    def known_size(self, url, min_dimension):
+        """Tamanho em bytes se a URL pode ser pulada, ou None se precisa ser baixada.
+
+        Imagens rejeitadas só por serem pequenas voltam a valer para buscas com
+        exigência de resolução menor.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        status, size_bytes, max_dimension = entry
+        if status == SOURCE_REJECTED and max_dimension and max_dimension >= min_dimension:
+            return None
+        return size_bytes or 0
+
+    def record(self, url, term, status, size_bytes, max_dimension):
+        """Grava o veredito da URL; uma URL aceita nunca é rebaixada (ver add_source_urls)."""
+        key = normalize_url(url)
+        if status != SOURCE_ACCEPTED:
+            entry = self.lookup(url)
+            if entry is not None and entry[0] == SOURCE_ACCEPTED:
+                return
+        self.db_manager.add_source_urls([(key, term, status, size_bytes, max_dimension)])
+        self._remember(key, (status, size_bytes, max_dimension))
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
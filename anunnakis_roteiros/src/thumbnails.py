@@ -0,0 +1,66 @@
+"""Cache de miniaturas em disco para a galeria.
+
+As miniaturas ficam em `cache_dir/<2 primeiros>/<hash>_<tamanho>.jpg`, com a
+chave sendo o MD5 do conteúdo da imagem (o mesmo do BD): renomear ou mover o
+arquivo original não invalida o cache, e reabrir a galeria só lê JPEGs pequenos.
+Não depende de Qt.
+"""
+import os
+import re
+
+THUMBNAIL_SIZE = 160
+
+# Nome dado pelo scraper: <termo>_<8 primeiros do hash>_<timestamp>.<ext>
+_SAVED_NAME_RE = re.compile(r'_([0-9a-f]{8})_\d+\.\w+$')
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+
+    def path_for(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}_{self.size}.jpg")
+
+    def get(self, digest):
+        """Caminho da miniatura se já estiver no cache, senão None."""
+        path = self.path_for(digest)
+        return path if os.path.exists(path) else None
+
+    def create(self, image_path, digest):
+        """Gera a miniatura (JPEG) e grava no cache de forma atômica. Retorna o caminho."""
+        from PIL import Image
+
+        path = self.path_for(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with Image.open(image_path) as img:
+            # JPEG: o decodificador já reduz a escala (1/2, 1/4, 1/8) em vez de ler tudo
+            img.draft('RGB', (self.size * 2, self.size * 2))
+            img.thumbnail((self.size, self.size))
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            img.save(tmp_path, 'JPEG', quality=85)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_or_create(self, image_path, digest):
+        return self.get(digest) or self.create(image_path, digest)
+
+
+def index_saved_images(image_dir):
+    """Mapeia 8 primeiros caracteres do hash -> caminho, a partir dos nomes dos arquivos salvos.
+
+    Usado para achar o arquivo das imagens gravadas no BD antes da coluna file_path.
+    """
+    index = {}
+    try:
+        entries = os.scandir(image_dir)
+    except OSError:
+        return index
+    with entries:
+        for entry in entries:
+            match = _SAVED_NAME_RE.search(entry.name)
+            if match and entry.is_file():
+                index[match.group(1)] = entry.path
+    return index